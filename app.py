@@ -1,25 +1,25 @@
-<<<<<<< HEAD
 import os
 
 
 # Default to demo mode on Spaces; override locally with DEMO_MODE=0
 os.environ.setdefault("DEMO_MODE", "1")
 
-=======
->>>>>>> c1cdfcc6af1594e2e24ce705fd721fb65c2daa99
 from src.interface import demo
+from src import retention
 
-<<<<<<< Updated upstream
-demo.launch()
-=======
 if __name__ == "__main__":
     # Spaces sets PORT; default to 7860 locally
     port = int(os.getenv("PORT", "7860"))
     # Optional: disable SSR by setting SSR_MODE=0
     ssr_mode = os.getenv("SSR_MODE", "1") != "0"
 
-    # Queue helps avoid overlapping PDF jobs
-    demo.queue(default_concurrency_limit=1)
+    # Renders run in the render service's worker pool, so handlers only wait
+    # on their job; the queue just caps how many requests are open at once
+    demo.queue(default_concurrency_limit=int(os.getenv("UI_CONCURRENCY", "16")))
+
+    # Previews, job files and cached builds are pruned off the request path
+    retention.start_background()
+
     demo.launch(
         server_name="0.0.0.0",
         server_port=port,
@@ -28,4 +28,3 @@ if __name__ == "__main__":
         # ssr_mode
         # =ssr_mode,
     )
->>>>>>> Stashed changes
@@ -0,0 +1,214 @@
+"""
+benchmarks/bench_pipeline.py
+
+Stage-level benchmark of the Excel -> PDF pipeline.
+
+Each case runs in a fresh process so peak memory is per case. Results are
+written as JSON and can be compared against an earlier run:
+
+    python -m benchmarks.bench_pipeline --sizes 100,10000 --out bench_results/head.json
+    python -m benchmarks.bench_pipeline --sizes 100,10000 --compare bench_results/main.json
+"""
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from benchmarks.synthetic import make_workbook
+
+
+DATA_DIR = "bench_data"
+STAGES = ["load_excel", "validate", "clean_dataframe", "add_computed_fields", "render", "output", "preview", "end_to_end"]
+
+
+def _timed(stages: dict, name: str, fn, *args, **kwargs):
+
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    stages[name] = round(time.perf_counter() - start, 4)
+    return value
+
+def _peak_rss_mb():
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_case(excel_path: str, with_preview: bool = True) -> dict:
+    """Time each pipeline stage for one workbook (runs in a child process)."""
+
+    # Set before src is imported: an empty workbook cache, so end_to_end
+    # times the streaming path rather than a Parquet hit from an earlier run
+    cache_dir = tempfile.mkdtemp(prefix="bench-workbooks-")
+    os.environ["WORKBOOK_CACHE_DIR"] = cache_dir
+
+    from src.excel_parser import load_excel, validate_columns, clean_dataframe, add_computed_fields
+    from src.validation import validate
+    from src.pdf_generator import ProductSheetPDF
+    from src.records import build_product_records
+    from src.run_generators import generate_pdf_from_excel, render_product_records
+
+    stages = {}
+    pdf_path = os.path.splitext(excel_path)[0] + ".pdf"
+
+    df = _timed(stages, "load_excel", load_excel, excel_path)
+    validate_columns(df)
+    _timed(stages, "validate", validate, df)
+    df = _timed(stages, "clean_dataframe", clean_dataframe, df)
+    df = _timed(stages, "add_computed_fields", add_computed_fields, df)
+
+    def render():
+        pdf = ProductSheetPDF()
+        pdf.cover_page("Product Sheet")
+        pdf.add_page()
+        render_product_records(pdf, build_product_records(df))
+        return pdf
+
+    pdf = _timed(stages, "render", render)
+    _timed(stages, "output", pdf.output, pdf_path)
+
+    stages["preview"] = None
+    if with_preview:
+        from src import preview
+        try:
+            # Fresh cache dir, so this times rendering rather than a cache hit
+            with tempfile.TemporaryDirectory() as preview_dir:
+                _timed(stages, "preview", preview.render_preview, pdf_path, cache_dir=preview_dir)
+        except Exception as e:
+            print(f"[bench] preview skipped: {e}", file=sys.stderr)
+        finally:
+            preview.shutdown()
+
+    # The streaming path the CLI actually uses
+    _timed(stages, "end_to_end", generate_pdf_from_excel, excel_path, pdf_path)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {
+        "rows": len(df),
+        "pages": pdf.page_no(),
+        "pdf_bytes": os.path.getsize(pdf_path),
+        "stages": stages,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def _run_isolated(excel_path: str, with_preview: bool) -> dict:
+
+    # Executor workers are not daemonic, so the preview can start its own pool
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, excel_path, with_preview).result()
+
+def _git_commit():
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmarks(sizes, sheets=1, long_descriptions=False, repeat=1, with_preview=True) -> dict:
+
+    cases = []
+    for rows in sizes:
+        name = f"{rows}x{sheets}{'-long' if long_descriptions else ''}"
+        excel_path = os.path.join(DATA_DIR, f"{name}.xlsx")
+        if not os.path.exists(excel_path):
+            make_workbook(excel_path, rows, sheets, long_descriptions)
+
+        runs = [_run_isolated(excel_path, with_preview) for _ in range(repeat)]
+        # Keep the fastest run per stage; it is the least noisy
+        best = dict(runs[0])
+        best["stages"] = {
+            stage: min((r["stages"][stage] for r in runs if r["stages"].get(stage) is not None), default=None)
+            for stage in STAGES
+        }
+        best["peak_rss_mb"] = max((r["peak_rss_mb"] or 0) for r in runs) or None
+        best["name"] = name
+        cases.append(best)
+        print(format_case(best))
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+
+def format_case(case: dict) -> str:
+
+    stages = " ".join(
+        f"{stage}={seconds:.3f}s" for stage, seconds in case["stages"].items() if seconds is not None
+    )
+    return f"{case['name']}: {case['rows']} rows, {case['pages']} pages, peak {case['peak_rss_mb']} MB | {stages}"
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list[str]:
+    """Return one line per stage that got slower than `threshold` (0.2 = 20%)."""
+
+    previous = {case["name"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in current["cases"]:
+        old = previous.get(case["name"])
+        if old is None:
+            continue
+        for stage, seconds in case["stages"].items():
+            old_seconds = old["stages"].get(stage)
+            # Ignore sub-10ms stages; they are all noise
+            if seconds is None or not old_seconds or max(seconds, old_seconds) < 0.01:
+                continue
+            if seconds > old_seconds * (1 + threshold):
+                regressions.append(
+                    f"{case['name']} {stage}: {old_seconds:.3f}s -> {seconds:.3f}s (+{seconds / old_seconds - 1:.0%})"
+                )
+        if old.get("peak_rss_mb") and case.get("peak_rss_mb") and case["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{case['name']} peak_rss_mb: {old['peak_rss_mb']} -> {case['peak_rss_mb']}")
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the Excel -> PDF pipeline")
+    parser.add_argument("--sizes", type=str, default="100,10000", help="Comma-separated row counts")
+    parser.add_argument("--sheets", type=int, default=1)
+    parser.add_argument("--long-descriptions", action="store_true")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-preview", action="store_true", help="Skip the preview stage")
+    parser.add_argument("--out", type=str, help="Write results JSON here")
+    parser.add_argument("--compare", type=str, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        [int(size) for size in args.sizes.split(",")],
+        sheets=args.sheets,
+        long_descriptions=args.long_descriptions,
+        repeat=args.repeat,
+        with_preview=not args.no_preview,
+    )
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
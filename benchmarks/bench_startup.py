@@ -0,0 +1,82 @@
+"""
+benchmarks/bench_startup.py
+
+CLI start-up benchmark.
+
+Runs each command in a fresh interpreter several times and reports the
+best and median wall time. Commands slower than their target fail the
+run, so this can gate CI:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 20 --out bench_results/startup.json
+"""
+
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import make_workbook
+
+
+def _cases(workbook: str, output: str) -> list[tuple]:
+    """`(name, argv after python, target ms or None for report-only)` per command."""
+
+    return [
+        ("python", ["-c", "pass"], None),
+        ("help", ["main.py", "--help"], 100),
+        ("generate_help", ["main.py", "generate", "--help"], 100),
+        ("generate_small", ["main.py", "generate", "--input", workbook, "--output", output], None),
+    ]
+
+def _run(argv: list[str]) -> float:
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *argv], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark CLI start-up time")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--out", type=str, help="Write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workbook = make_workbook(os.path.join(tmp_dir, "small.xlsx"), rows=10)
+        cases = _cases(workbook, os.path.join(tmp_dir, "small.pdf"))
+
+        results = {}
+        failed = []
+        for name, argv, target in cases:
+            # One untimed run warms the OS file cache and .pyc files
+            _run(argv)
+            times = [_run(argv) for _ in range(args.repeat)]
+            results[name] = {
+                "best_ms": round(min(times), 1),
+                "median_ms": round(statistics.median(times), 1),
+                "target_ms": target,
+            }
+            status = ""
+            if target is not None:
+                ok = results[name]["median_ms"] <= target
+                status = f"  {'OK' if ok else 'SLOW'} (target {target} ms)"
+                if not ok:
+                    failed.append(name)
+            print(f"{name:<16} best {results[name]['best_ms']:7.1f} ms  median {results[name]['median_ms']:7.1f} ms{status}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
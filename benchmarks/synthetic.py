@@ -0,0 +1,69 @@
+"""
+benchmarks/synthetic.py
+
+Synthetic product catalogues for benchmarking.
+
+    python -m benchmarks.synthetic --rows 10000 --sheets 3 --long-descriptions --out bench_data/10k.xlsx
+"""
+
+
+import argparse
+import os
+import random
+from openpyxl import Workbook
+
+
+COLUMNS = ["SKU", "Name", "Description", "Price", "Stock"]
+
+ADJECTIVES = ["Red", "Blue", "Green", "Spooky", "Classic", "Deluxe", "Mini", "Organic", "Vintage", "Thermal"]
+NOUNS = ["T-Shirt", "Mug", "Hat", "Scarf", "Notebook", "Gloves", "Candle", "Poster", "Tote Bag", "Keyring"]
+WORDS = (
+    "cotton ceramic wool silk recycled handmade printed unisex adult size patterned "
+    "limited edition gift boxed dishwasher safe lined soft durable lightweight"
+).split()
+
+
+def _description(rng: random.Random, long: bool) -> str:
+
+    length = rng.randint(40, 120) if long else rng.randint(3, 8)
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize()
+
+def make_workbook(path: str, rows: int, sheets: int = 1, long_descriptions: bool = False, seed: int = 0) -> str:
+    """
+    Write a workbook with `rows` products per sheet matching REQUIRED_COLUMNS.
+
+    The same seed always produces the same data, so results are comparable
+    across commits.
+    """
+
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    workbook = Workbook(write_only=True)
+    for sheet_index in range(sheets):
+        sheet = workbook.create_sheet(f"Category {sheet_index + 1}")
+        sheet.append(COLUMNS)
+        for i in range(rows):
+            sheet.append([
+                f"S{sheet_index + 1:02d}-{i:07d}",
+                f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}",
+                _description(rng, long_descriptions),
+                round(rng.uniform(0.5, 250), 2),
+                rng.randint(0, 500),
+            ])
+
+    workbook.save(path)
+    return path
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic product workbook")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--sheets", type=int, default=1)
+    parser.add_argument("--long-descriptions", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=str, required=True)
+    args = parser.parse_args()
+
+    print(make_workbook(args.out, args.rows, args.sheets, args.long_descriptions, args.seed))
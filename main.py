@@ -3,21 +3,17 @@ src/main.py
 
 Main CLI script for PDF generation.
 Supports both single file and folder batch processing.
+
+Only argparse is imported up front. Each subcommand imports what it
+needs when it runs, so `--help` and small cron-driven runs don't pay for
+pandas, fpdf, watchdog or requests they never use
+(see `benchmarks/bench_startup.py`).
 """
 
 
 import argparse
 import os
-from src.run_generators import generate_pdf_from_excel, generate_pdfs_from_folder
-from src.watcher import start_watcher
-from src.sender import send_pdf_via_email
-from src.scheduler import start_scheduler
-from src.slack import post_to_slack
-from src.webhook import post_webhook_message
-from dotenv import load_dotenv
-
-
-load_dotenv()
+from src.options import SHEET_MODES, LAYOUTS
 
 
 def main():
@@ -33,36 +29,202 @@ def main():
     generate.add_argument("--email", action="store_true", help="Send email after generating")
     generate.add_argument("--slack", action="store_true", help="Post to Slack after generating")
     generate.add_argument("--webhook", action="store_true", help="Send webhook after generating")
+    generate.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes: one per workbook for --folder, page-range shards for large --input sheets (default: 1)",
+    )
+    generate.add_argument("--force", action="store_true", help="Rebuild all PDFs for --folder, even if unchanged")
+    generate.add_argument(
+        "--reproducible",
+        action="store_true",
+        help="With --input: name the PDF <workbook>-<content hash>.pdf in --output's folder and reuse it if it already exists",
+    )
+    generate.add_argument(
+        "--delta",
+        action="store_true",
+        help="With --input: render only products changed since the last --delta run (--output is the changes PDF)",
+    )
+    generate.add_argument("--full-output", type=str, help="With --delta: also rebuild the full catalogue here when anything changed")
+    generate.add_argument("--snapshot", type=str, help="With --delta: snapshot name (default: the workbook's file name)")
+    generate.add_argument(
+        "--sheets",
+        choices=SHEET_MODES,
+        default="first",
+        help="first: first sheet only; sections: every sheet in one PDF with contents; separate: one PDF per sheet",
+    )
+    generate.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default="cards",
+        help="cards: one boxed card per product; table: dense multi-column price list",
+    )
 
     # Schedule subcommand
-    subparsers.add_parser("schedule", help="Run email scheduler for new/summary PDFs")
+    schedule = subparsers.add_parser("schedule", help="Run email scheduler for new/summary PDFs")
+    schedule.add_argument("--minutes", type=float, help="Stop after this many minutes (default: run until Ctrl+C)")
+
+    # Cleanup subcommand
+    subparsers.add_parser("cleanup", help="Apply retention policies to temp/, cache/ and outputs/ once")
 
     # Watch subcommand
-    subparsers.add_parser("watch", help="Watch folder for new Excel files and auto-generate PDFs")
+    watch = subparsers.add_parser("watch", help="Watch folder for new Excel files and auto-generate PDFs")
+    watch.add_argument("--workers", type=int, help="Worker processes for regeneration")
 
     args = parser.parse_args()
 
+    # Before any src module reads its settings from the environment
+    from dotenv import load_dotenv
+    load_dotenv()
+
     if args.command == "generate":
-        if args.input:
-            output_path = args.output or "outputs/generated_output.pdf"
-            generate_pdf_from_excel(args.input, output_path)
-            if args.email:
-                send_pdf_via_email(output_path)
-            if args.slack:
-                post_to_slack(output_path)
-            if args.webhook:
-                post_webhook_message(os.getenv("WEBHOOK_URL"), output_path)
+        if args.input and args.delta:
+            _generate_delta(args)
+        elif args.input:
+            _generate_file(args)
         elif args.folder:
-            generate_pdfs_from_folder(args.folder)
+            _generate_folder(args)
         else:
             print("You must provide --input or --folder")
 
     elif args.command == "schedule":
-        start_scheduler()
+        from src.scheduler import start_scheduler
+        start_scheduler(run_for_minutes=args.minutes)
+
+    elif args.command == "cleanup":
+        from src import retention
+        for stats in retention.compact_all():
+            print(retention.format_stats(stats))
 
     elif args.command == "watch":
-        start_watcher()
+        from src.watcher import start_watcher
+        start_watcher(**({"workers": args.workers} if args.workers else {}))
+
+
+def _generate_file(args):
+
+    from src.render_service import format_job
+    from src.run_generators import format_result
+    from src import metrics
+
+    output_path = args.output or "outputs/generated_output.pdf"
+    artifact_dir = None
+    if args.reproducible and args.sheets != "separate":
+        # The service picks the content-addressed name
+        artifact_dir, output_path = os.path.dirname(output_path) or ".", None
+    # Started before rendering, so the run's total time covers it
+    run = metrics.RunMetrics(os.path.basename(args.input))
+    job = _render_with_progress(args.input, output_path, args, artifact_dir)
+    if job["result"] is None:
+        print(format_job(job))
+        raise SystemExit(130 if job["status"] == "cancelled" else 1)
+
+    result = job["result"]
+    with metrics.collect(run=run):
+        if result["metrics"]:
+            run.merge(result["metrics"])
+        print(format_result(result))
+        if result["validation"]:
+            from src.validation import format_report
+            for line in format_report(result["validation"]):
+                print(f"  {line}")
+        if not result["error"] and (args.email or args.slack or args.webhook):
+            from src.notify import notify, collect_results, format_results
+            futures = notify(result["output"], email=args.email, slack=args.slack, webhook=args.webhook)
+            for line in format_results(collect_results(futures)):
+                print(line)
+    metrics.export(run.snapshot(status="error" if result["error"] else "ok", path=args.input))
+    if result["error"]:
+        raise SystemExit(1)
+
+def _generate_delta(args):
+
+    from src.run_generators import generate_delta_from_excel, format_result
+    from src.delta import format_summary
+    from src import metrics
+
+    name = os.path.splitext(os.path.basename(args.input))[0]
+    output_path = args.output or os.path.join("outputs", f"{name}_changes.pdf")
+    with metrics.collect(os.path.basename(args.input)) as run:
+        try:
+            result = generate_delta_from_excel(
+                args.input, output_path, full_output=args.full_output, layout=args.layout, snapshot=args.snapshot, workers=args.workers
+            )
+        except Exception as e:
+            print(f"FAILED {os.path.basename(args.input)}: {type(e).__name__}: {e}")
+            metrics.export(run.snapshot(status="error", path=args.input))
+            raise SystemExit(1)
+
+        print(format_result(result))
+        if result["full"]:
+            print(format_result(result["full"]))
+        # Recipients only hear about real changes
+        if not result["skipped"] and (args.email or args.slack or args.webhook):
+            from src.notify import notify, collect_results, format_results
+            futures = notify(
+                result["output"],
+                email=args.email,
+                slack=args.slack,
+                webhook=args.webhook,
+                message=f"Catalogue changes for {name}: {format_summary(result['delta'])}",
+                payload={"delta": result["delta"]},
+            )
+            for line in format_results(collect_results(futures)):
+                print(line)
+    metrics.export(run.snapshot(status="ok", path=args.input))
+
+def _generate_folder(args):
+
+    from src.run_generators import generate_pdfs_from_folder, format_result
+
+    results, removed = generate_pdfs_from_folder(
+        args.folder,
+        workers=args.workers,
+        force=args.force,
+        layout=args.layout,
+        progress=lambda i, total, result: print(f"[{i}/{total}] {format_result(result)}"),
+    )
+    for path in removed:
+        print(f"Removed orphaned PDF: {path}")
+    failed = [r for r in results if r["error"]]
+    skipped = [r for r in results if r["skipped"]]
+    rows = sum(r["rows"] for r in results)
+    pages = sum(r["pages"] for r in results)
+    print(
+        f"Done: {len(results) - len(failed)}/{len(results)} succeeded "
+        f"({len(skipped)} unchanged), {rows} rows, {pages} pages."
+    )
+    if failed:
+        raise SystemExit(1)
+
+def _render_with_progress(input_path, output_path, args, artifact_dir=None) -> dict:
+    """Render through the same job service as the web UI; Ctrl-C cancels the job."""
+
+    from src.render_service import RenderService, format_job, FINISHED
+
+    # In-process: a one-off run shouldn't start (and re-import into) a worker process
+    if artifact_dir:
+        service = RenderService(workers=0, reproducible=True, artifact_dir=artifact_dir)
+    else:
+        service = RenderService(workers=0)
+    try:
+        job_id = service.submit(input_path, output_path, sheets=args.sheets, layout=args.layout, render_workers=args.workers)
+        job, last_line = service.get(job_id), None
+        while job["status"] not in FINISHED:
+            line = format_job(job)
+            if line != last_line:
+                print(line)
+                last_line = line
+            try:
+                job = service.wait(job_id, timeout=1)
+            except KeyboardInterrupt:
+                service.cancel(job_id)
+                job = service.wait(job_id)
+        return job
+    finally:
+        service.shutdown()
+
 
-    
 if __name__ == "__main__":
     main()
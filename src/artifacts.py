@@ -0,0 +1,70 @@
+"""
+src/artifacts.py
+
+Content-addressed PDF builds.
+
+PDFs are reproducible (see `default_build_date`), so a build is fully
+determined by the workbook bytes, the template fingerprint, the sheet
+mode, the layout and the build date. That is hashed into the file name,
+`<workbook>-<key>.pdf`, and a build whose file already exists is not run
+again: the existing PDF (and its recorded rows/pages) is reused.
+"""
+
+
+import hashlib
+import json
+import os
+from src.manifest import file_hash, template_fingerprint
+from src.pdf_generator import default_build_date
+
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join("cache", "artifacts"))
+REPRODUCIBLE_BUILDS = os.getenv("REPRODUCIBLE_BUILDS", "1") == "1"
+
+KEY_LENGTH = 16
+
+
+def build_key(excel_path: str, sheets: str = "first", layout: str = "cards") -> str:
+
+    digest = hashlib.sha256()
+    digest.update(file_hash(excel_path).encode())
+    digest.update(template_fingerprint(layout=layout).encode())
+    digest.update(f"{sheets}|{layout}|{default_build_date().isoformat()}".encode())
+    return digest.hexdigest()[:KEY_LENGTH]
+
+def artifact_path(folder: str, excel_path: str, key: str) -> str:
+
+    stem = os.path.splitext(os.path.basename(excel_path))[0]
+    return os.path.join(folder, f"{stem}-{key}.pdf")
+
+def _info_path(path: str) -> str:
+
+    return f"{path}.json"
+
+def lookup(path: str) -> dict | None:
+    """
+    What was recorded for an existing artifact (`rows`, `pages`,
+    `validation`), or None. A hit refreshes the artifact's mtime, so
+    retention ages artifacts by last use rather than by build time.
+    """
+
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(_info_path(path)) as f:
+            info = json.load(f)
+        os.utime(path)
+        os.utime(_info_path(path))
+    except (OSError, ValueError):
+        # Built but never recorded (e.g. a crash in between), or pruned just now: rebuild
+        return None
+    return info
+
+def publish(tmp_path: str, path: str, result: dict) -> None:
+    """Move a finished build into place and record its details next to it."""
+
+    info = {"rows": result["rows"], "pages": result["pages"], "validation": result.get("validation")}
+    with open(f"{tmp_path}.json", "w") as f:
+        json.dump(info, f)
+    os.replace(tmp_path, path)
+    os.replace(f"{tmp_path}.json", _info_path(path))
@@ -0,0 +1,78 @@
+"""
+src/card_layout.py
+
+The default layout: one boxed card per product.
+
+Cards are measured and paginated before drawing (see `src/pagination.py`),
+so a card is never split across pages and its border always matches its
+content.
+"""
+
+
+from src.pagination import LineWrapper, paginate
+
+
+LABEL_FONT = ("B", 13)
+BODY_FONT = ("", 11)
+LINE_HEIGHT = 8
+# Spacer drawn above each card, and how far its border reaches below the last line
+GAP = 10
+BORDER_BELOW = 8
+TEXT_LEFT = 15
+
+
+class CardLayout:
+    """
+    Lays out `build_product_records` output on a `ProductSheetPDF`.
+
+        layout = CardLayout(pdf)
+        layout.render(records)
+
+    One instance per document, so the wrap cache spans every chunk.
+    """
+
+    def __init__(self, pdf):
+
+        self.pdf = pdf
+        self.wrapper = LineWrapper(pdf)
+
+    def measure(self, records) -> list[tuple]:
+        """`(label_lines, description_lines, height)` for every record, one font switch per field."""
+
+        pdf = self.pdf
+        width = pdf.w - pdf.r_margin - TEXT_LEFT - 2 * pdf.c_margin
+
+        pdf.set_font("Helvetica", *LABEL_FONT)
+        labels = [self.wrapper.wrap(record.label, width) for record in records]
+        pdf.set_font("Helvetica", *BODY_FONT)
+        descriptions = [self.wrapper.wrap(record.description, width) for record in records]
+
+        blocks = []
+        for record, label_lines, description_lines in zip(records, labels, descriptions):
+            # Label, description, price, optional VAT price, stock
+            lines = len(label_lines) + len(description_lines) + 2 + (record.price_with_vat is not None)
+            blocks.append((label_lines, description_lines, GAP + lines * LINE_HEIGHT))
+        return blocks
+
+    def plan(self, blocks, y: float) -> list[list[int]]:
+        """Pages of block indexes, starting from `y` on the current page."""
+
+        pdf = self.pdf
+        heights = [height for _, _, height in blocks]
+        return paginate(heights, y, pdf.content_top, pdf.page_break_trigger, overhang=BORDER_BELOW)
+
+    def draw(self, records, blocks, pages) -> None:
+        """Draw a page plan from `plan`; every list after the first starts a new page."""
+
+        pdf = self.pdf
+        for page_index, indexes in enumerate(pages):
+            if page_index:
+                pdf.add_page()
+            for index in indexes:
+                label_lines, description_lines, _ = blocks[index]
+                pdf.add_product_block(records[index], label_lines, description_lines)
+
+    def render(self, records) -> None:
+
+        blocks = self.measure(records)
+        self.draw(records, blocks, self.plan(blocks, self.pdf.get_y()))
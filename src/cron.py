@@ -0,0 +1,318 @@
+"""
+src/cron.py
+
+Cron-style job scheduler.
+
+Jobs are plain callables with a five-field cron expression
+(`minute hour day month weekday`, e.g. "0 9 1 * *" for 09:00 on the 1st,
+or a macro such as "@monthly"). Next-run times are saved to a JSON state
+file, so a restart picks up where the last process stopped: a run that
+came due while nothing was running is caught up once on start-up (or
+skipped, per job), however many were missed.
+
+A single thread sleeps until the earliest deadline and hands due jobs to
+a thread pool, so a slow job never delays the others. Each job has a
+concurrency limit (one by default); a run that comes due while the limit
+is reached is skipped rather than overlapping.
+
+    scheduler = CronScheduler()
+    scheduler.add_job("send", send_unsent_pdfs, "* * * * *")
+    scheduler.start()
+"""
+
+
+import json
+import os
+import threading
+import time
+from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+# Not in outputs/: rewriting it there would look like a new PDF to the sent index's folder check
+SCHEDULER_STATE_FILE = os.getenv("SCHEDULER_STATE_FILE", os.path.join("cache", "scheduler_state.json"))
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "4"))
+
+# A run this late counts as missed (the process wasn't running), not just slow to wake
+MISFIRE_GRACE_SECONDS = float(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "60"))
+# Wake at least this often, so a changed system clock can't oversleep a deadline by much
+MAX_SLEEP_SECONDS = 60.0
+
+CATCH_UP = ("once", "skip")
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+WEEKDAY_NAMES = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+
+# (name, lowest, highest, names for the values from `lowest`)
+FIELDS = [
+    ("minute", 0, 59, None),
+    ("hour", 0, 23, None),
+    ("day", 1, 31, None),
+    ("month", 1, 12, MONTH_NAMES),
+    ("weekday", 0, 7, WEEKDAY_NAMES),
+]
+
+# How far ahead to look before deciding an expression never fires (e.g. "0 0 31 2 *")
+MAX_YEARS_AHEAD = 5
+
+
+def _value(text: str, field: tuple) -> int:
+
+    name, low, high, names = field
+    if names and text.lower() in names:
+        return low + names.index(text.lower())
+    try:
+        value = int(text)
+    except ValueError:
+        raise ValueError(f"Invalid {name} value: {text!r}")
+    if not low <= value <= high:
+        raise ValueError(f"{name.capitalize()} {value} out of range {low}-{high}")
+    return value
+
+def _parse_field(text: str, field: tuple) -> set:
+    """Values matched by one field: `*`, `5`, `1-5`, `*/15`, `10-40/10`, `mon,wed`..."""
+
+    _, low, high, _ = field
+    values = set()
+    for part in text.split(","):
+        base, _, step = part.partition("/")
+        if step:
+            if not step.isdigit() or int(step) == 0:
+                raise ValueError(f"Invalid step in {part!r}")
+            step = int(step)
+
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (_value(bound, field) for bound in base.split("-", 1))
+            if start > end:
+                raise ValueError(f"Invalid range {base!r}")
+        else:
+            start = _value(base, field)
+            # "5/15" means from 5 to the end, every 15
+            end = high if step else start
+        values.update(range(start, end + 1, step or 1))
+    return values
+
+
+class CronSchedule:
+    """
+    A parsed cron expression. Day of month and weekday follow cron: when
+    both are restricted, a day matching either one fires.
+    """
+
+    def __init__(self, expression: str):
+
+        self.expression = expression
+        fields = MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != len(FIELDS):
+            raise ValueError(f"Cron expression needs {len(FIELDS)} fields: {expression!r}")
+
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(text, field) for text, field in zip(fields, FIELDS)
+        )
+        # Sunday is 0 or 7
+        self.weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+        # Fail now, not on the first tick
+        self.next_after(time.time())
+
+    def _day_matches(self, moment: datetime) -> bool:
+
+        day = moment.day in self.days
+        # datetime counts Monday as 0; cron counts Sunday as 0
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, timestamp: float) -> float:
+        """First matching minute strictly after `timestamp`, in local time."""
+
+        start = datetime.fromtimestamp(timestamp)
+        moment = start.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        while moment.year <= start.year + MAX_YEARS_AHEAD:
+            if moment.month not in self.months:
+                moment = moment.replace(day=1, hour=0, minute=0) + timedelta(days=monthrange(moment.year, moment.month)[1])
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+def _load_state(path: str) -> dict:
+
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Losing it only means missed runs aren't caught up
+        return {}
+
+def _format_time(timestamp: float | None) -> str:
+
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else "never"
+
+
+class CronScheduler:
+    """
+    Runs callables on cron schedules. Thread-safe; `add_job` works before
+    or after `start`.
+    """
+
+    def __init__(self, state_file: str = SCHEDULER_STATE_FILE, workers: int = SCHEDULER_WORKERS):
+
+        self.state_file = state_file
+        self.workers = max(1, workers)
+
+        self._jobs = {}
+        self._state = _load_state(state_file)
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._executor = None
+        self._thread = None
+
+    def add_job(self, name: str, func, cron: str, max_instances: int = 1, catch_up: str = "once") -> dict:
+        """
+        Schedule `func()` on `cron`. `max_instances` caps concurrent runs of
+        this job; `catch_up` is "once" (run a missed run on start-up) or "skip".
+        """
+
+        if catch_up not in CATCH_UP:
+            raise ValueError(f"catch_up must be one of {CATCH_UP}, got {catch_up!r}")
+        schedule = CronSchedule(cron)
+
+        saved = self._state.get(name, {})
+        if saved.get("cron") == cron and saved.get("next_run"):
+            # Restarted: keep the saved deadline, even if it has passed
+            next_run = saved["next_run"]
+        else:
+            next_run = schedule.next_after(time.time())
+
+        job = {
+            "name": name,
+            "func": func,
+            "schedule": schedule,
+            "max_instances": max(1, max_instances),
+            "catch_up": catch_up,
+            "next_run": next_run,
+            "running": 0,
+        }
+        with self._cond:
+            self._jobs[name] = job
+            self._record(name, cron=cron, next_run=next_run)
+            self._cond.notify()
+        return job
+
+    def start(self) -> None:
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cron-job")
+        self._thread = threading.Thread(target=self._loop, name="cron", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop scheduling and wait for running jobs to finish."""
+
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def jobs(self) -> list[dict]:
+
+        with self._cond:
+            return [
+                {"name": job["name"], "cron": job["schedule"].expression, "next_run": job["next_run"], "running": job["running"],
+                 "last_run": self._state[job["name"]].get("last_run"), "last_status": self._state[job["name"]].get("last_status")}
+                for job in self._jobs.values()
+            ]
+
+    def _loop(self) -> None:
+
+        with self._cond:
+            while not self._stopped:
+                now = time.time()
+                for job in self._jobs.values():
+                    if job["next_run"] <= now:
+                        self._fire(job, now)
+
+                next_run = min((job["next_run"] for job in self._jobs.values()), default=None)
+                timeout = MAX_SLEEP_SECONDS if next_run is None else max(0.0, next_run - time.time())
+                self._cond.wait(min(timeout, MAX_SLEEP_SECONDS))
+
+    def _fire(self, job: dict, now: float) -> None:
+
+        name = job["name"]
+        missed = now - job["next_run"] > MISFIRE_GRACE_SECONDS
+        due = job["next_run"]
+        # From now, not from the old deadline: any number of missed runs collapse into this one
+        job["next_run"] = job["schedule"].next_after(now)
+        self._record(name, next_run=job["next_run"])
+
+        if missed and job["catch_up"] == "skip":
+            print(f"[Scheduler] {name}: skipped run missed at {_format_time(due)}")
+            return
+        if job["running"] >= job["max_instances"]:
+            print(f"[Scheduler] {name}: still running, skipped the {_format_time(due)} run")
+            return
+        if missed:
+            print(f"[Scheduler] {name}: catching up run missed at {_format_time(due)}")
+
+        job["running"] += 1
+        self._record(name, last_run=now)
+        future = self._executor.submit(job["func"])
+        future.add_done_callback(lambda f: self._on_done(job, now, f))
+
+    def _on_done(self, job: dict, started: float, future) -> None:
+
+        error = future.exception()
+        if error:
+            print(f"[Scheduler] {job['name']} failed: {type(error).__name__}: {error}")
+
+        with self._cond:
+            job["running"] -= 1
+            self._record(
+                job["name"],
+                last_finished=time.time(),
+                last_duration=round(time.time() - started, 3),
+                last_status=f"error: {error}" if error else "ok",
+            )
+            self._cond.notify()
+
+    def _record(self, name: str, **fields) -> None:
+        """Update a job's saved state. Called with `_cond` held."""
+
+        self._state.setdefault(name, {}).update(fields)
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_file)
+
+
+def format_job(job: dict) -> str:
+
+    return f"{job['name']} [{job['cron']}]: next run {_format_time(job['next_run'])}, last {job['last_status'] or 'never run'}"
@@ -0,0 +1,219 @@
+"""
+src/delta.py
+
+Delta catalogues: what changed between two versions of a workbook.
+
+Each build stores a snapshot of the cleaned sheet (one row per SKU plus a
+hash of the fields that matter). The next build hashes its rows the same
+way and joins on SKU, so finding the few hundred changed products among
+tens of thousands is a single vectorized pass, and only those products
+are rendered into a small "changes" PDF:
+
+    previous = load_snapshot("catalogue")
+    changes = diff(previous, df)
+    if changes_count(changes):
+        render_changes(changes, "outputs/catalogue_changes.pdf")
+    save_snapshot("catalogue", changes["snapshot"])
+"""
+
+
+import os
+import numpy as np
+import pandas as pd
+from src.pdf_generator import ProductSheetPDF, BRAND_PURPLE
+from src.pdf_output import save_pdf
+from src.records import build_table_rows
+from src.table_layout import TableLayout, HEADER_HEIGHT, LINE_HEIGHT
+
+
+SNAPSHOT_DIR = os.getenv("DELTA_SNAPSHOT_DIR", "snapshots")
+
+# A product counts as changed when any of these differ
+COMPARE_COLUMNS = ["Name", "Description", "Price", "Stock"]
+# Kept in the snapshot so removed and changed products can show their old values
+SNAPSHOT_COLUMNS = ["SKU", *COMPARE_COLUMNS, "PriceWithVAT"]
+
+# (title, width in mm, align, wraps); see `TABLE_COLUMNS`
+CHANGE_COLUMNS = [
+    ("SKU", 24, "L", True),
+    ("Product", 52, "L", True),
+    ("Price was", 19, "R", False),
+    ("Price now", 19, "R", False),
+    ("Stock was", 17, "R", False),
+    ("Stock now", 17, "R", False),
+    ("Changed", 42, "L", True),
+]
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of `COMPARE_COLUMNS` per row, independent of how the columns are typed."""
+
+    normalized = pd.DataFrame({
+        "Name": df["Name"].to_numpy(dtype=object),
+        "Description": df["Description"].to_numpy(dtype=object),
+        "Price": df["Price"].to_numpy(dtype=float),
+        "Stock": df["Stock"].to_numpy(dtype="int64"),
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+def make_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Snapshot of a cleaned sheet: `SNAPSHOT_COLUMNS` plus "RowHash", one row per SKU."""
+
+    snapshot = df[SNAPSHOT_COLUMNS].drop_duplicates("SKU", keep="first").reset_index(drop=True)
+    snapshot["RowHash"] = row_hashes(snapshot)
+    return snapshot
+
+def _snapshot_path(name: str) -> str:
+
+    return os.path.join(SNAPSHOT_DIR, f"{name}.parquet")
+
+def load_snapshot(name: str) -> pd.DataFrame | None:
+    """The snapshot saved under `name`, or None before the first build."""
+
+    path = _snapshot_path(name)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+def save_snapshot(name: str, snapshot: pd.DataFrame) -> None:
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = _snapshot_path(name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    snapshot.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def diff(previous: pd.DataFrame | None, df: pd.DataFrame) -> dict:
+    """
+    Compare a cleaned sheet with the previous snapshot.
+
+    Returns:
+        dict: {"added", "removed", "changed": DataFrames, "unchanged": count,
+               "baseline": True when there was no previous snapshot,
+               "snapshot": the new snapshot to save once the build succeeds}.
+        "changed" has each compared column twice, new and "<column>_old",
+        plus a "Changed" column naming what differs.
+    """
+
+    snapshot = make_snapshot(df)
+    if previous is None:
+        empty = snapshot.iloc[0:0]
+        return {"added": empty, "removed": empty, "changed": empty, "unchanged": len(snapshot), "baseline": True, "snapshot": snapshot}
+
+    merged = snapshot.merge(previous, on="SKU", how="outer", suffixes=("", "_old"), indicator=True, sort=False)
+    added = merged[merged["_merge"] == "left_only"]
+    removed = merged[merged["_merge"] == "right_only"]
+    both = merged[merged["_merge"] == "both"]
+    changed = both[both["RowHash"] != both["RowHash_old"]].copy()
+
+    # Which fields differ, e.g. "price, stock"
+    labels = np.full(len(changed), "", dtype=object)
+    for column in COMPARE_COLUMNS:
+        new, old = changed[column], changed[f"{column}_old"]
+        differs = ((new != old) & ~(new.isna() & old.isna())).to_numpy()
+        labels[differs] = np.where(labels[differs] == "", column.lower(), labels[differs] + ", " + column.lower())
+    changed["Changed"] = labels
+
+    removed = removed[["SKU"]].assign(**{column: removed[f"{column}_old"] for column in SNAPSHOT_COLUMNS[1:]})
+    # The outer join turns Stock into floats; each subset has no gaps, so restore the ints
+    added = added[SNAPSHOT_COLUMNS].astype({"Stock": "int64"})
+    removed = removed.astype({"Stock": "int64"})
+    changed = changed.astype({"Stock": "int64", "Stock_old": "int64"})
+    return {
+        "added": added.reset_index(drop=True),
+        "removed": removed.reset_index(drop=True),
+        "changed": changed.reset_index(drop=True),
+        "unchanged": len(both) - len(changed),
+        "baseline": False,
+        "snapshot": snapshot,
+    }
+
+def changes_count(changes: dict) -> int:
+
+    return len(changes["added"]) + len(changes["removed"]) + len(changes["changed"])
+
+def summarize(changes: dict) -> dict:
+    """Counts for result lines, notifications and webhook payloads."""
+
+    changed = changes["changed"]
+    return {
+        "added": len(changes["added"]),
+        "removed": len(changes["removed"]),
+        "changed": len(changed),
+        "price_changes": int(changed["Changed"].str.contains("price").sum()) if len(changed) else 0,
+        "stock_changes": int(changed["Changed"].str.contains("stock").sum()) if len(changed) else 0,
+        "unchanged": changes["unchanged"],
+        "baseline": changes["baseline"],
+    }
+
+def format_summary(summary: dict) -> str:
+
+    if summary["baseline"]:
+        return f"baseline snapshot of {summary['unchanged']} products"
+    if not (summary["added"] or summary["removed"] or summary["changed"]):
+        return "no product changes"
+    return (
+        f"{summary['added']} added, {summary['removed']} removed, {summary['changed']} changed "
+        f"({summary['price_changes']} price, {summary['stock_changes']} stock)"
+    )
+
+def _change_rows(changed: pd.DataFrame) -> list[tuple]:
+    """`(cells, stripe)` rows for `CHANGE_COLUMNS`."""
+
+    money = lambda series: np.char.add("£", np.char.mod("%.2f", series.to_numpy(dtype=float))).tolist()
+    cells = zip(
+        changed["SKU"].astype(str).tolist(),
+        changed["Name"].astype(str).tolist(),
+        money(changed["Price_old"]),
+        money(changed["Price"]),
+        changed["Stock_old"].astype("int64").astype(str).tolist(),
+        changed["Stock"].astype("int64").astype(str).tolist(),
+        changed["Changed"].tolist(),
+    )
+    return [(row, i % 2 == 1) for i, row in enumerate(cells)]
+
+def _section_heading(pdf, title: str) -> None:
+
+    # Keep the heading with the table header and at least one row
+    if pdf.get_y() + 12 + HEADER_HEIGHT + LINE_HEIGHT > pdf.page_break_trigger:
+        pdf.add_page()
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.set_text_color(*BRAND_PURPLE)
+    pdf.cell(0, 10, title, ln=True)
+    pdf.ln(2)
+    pdf.set_text_color(0, 0, 0)
+
+def render_changes(changes: dict, output=None, name: str = "changes.pdf", title: str = "Catalogue changes"):
+    """
+    Draw added, removed and changed products as tables.
+
+    Returns:
+        tuple: `(output, pages)`; `output` as returned by `save_pdf`.
+    """
+
+    # No cover: every page gets the normal header and footer
+    pdf = ProductSheetPDF(first_page=2)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 18)
+    pdf.set_text_color(*BRAND_PURPLE)
+    pdf.cell(0, 10, title, ln=True)
+    pdf.set_font("Helvetica", "", 10)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 8, format_summary(summarize(changes)).capitalize(), ln=True)
+    pdf.ln(4)
+
+    sections = [
+        ("Changed", changes["changed"], CHANGE_COLUMNS, _change_rows),
+        ("Added", changes["added"], None, build_table_rows),
+        ("Removed", changes["removed"], None, build_table_rows),
+    ]
+    for heading, df, columns, build_rows in sections:
+        if df.empty:
+            continue
+        _section_heading(pdf, f"{heading} ({len(df)})")
+        # A fresh layout per section, so each table starts with its own header
+        TableLayout(pdf, columns).render(build_rows(df))
+        pdf.ln(6)
+
+    output, _ = save_pdf(pdf, output, name=name)
+    return output, pdf.page_no()
@@ -4,58 +4,133 @@ src/excel_parser.py
 
 
 import pandas as pd
+from openpyxl import load_workbook
+from src import metrics
 
 
 REQUIRED_COLUMNS = {"SKU", "Name", "Description", "Price", "Stock"}
+# Header for a sheet with no data rows
+COLUMN_ORDER = ["SKU", "Name", "Description", "Price", "Stock"]
+
+# Rows per chunk when streaming large workbooks
+DEFAULT_CHUNK_SIZE = 5000
 
 
 def validate_columns(df):
-    
-    missing = REQUIRED_COLUMNS - set(df.columns)
+    """Accepts a DataFrame or just its header (an iterable of column names)."""
+
+    columns = df.columns if isinstance(df, pd.DataFrame) else df
+    missing = REQUIRED_COLUMNS - {str(c).strip() for c in columns}
 
     if missing: 
         raise ValueError(f"Missing required columns: {missing}")
 
-def clean_empty_rows(df):
+def _open_workbook(path):
 
-    return df.dropna(how='all')
+    try:
+        return load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"Failed to load Excel: {e}")
 
-def check_for_invalid_values(df):
+def _sheet_chunks(sheet, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Validate the header of an open read-only worksheet, then yield its rows as DataFrames."""
+
+    # Some writers store a wrong sheet size, which truncates read-only reads
+    sheet.reset_dimensions()
+    rows = sheet.iter_rows(values_only=True)
+
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("Failed to load Excel: sheet is empty")
+    columns = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+    with metrics.span("validate"):
+        validate_columns(columns)
+
+    buffer = []
+    for row in rows:
+        # Skip blank lines, as pd.read_excel does
+        if all(value is None for value in row):
+            continue
+        # Rows end at their last non-empty cell, so pad trailing blanks back in
+        buffer.append(row[:len(columns)] + (None,) * (len(columns) - len(row)))
+        if len(buffer) >= chunk_size:
+            yield pd.DataFrame(buffer, columns=columns).infer_objects()
+            buffer = []
+
+    if buffer:
+        yield pd.DataFrame(buffer, columns=columns).infer_objects()
+
+def _sheet_frame(sheet):
+
+    chunks = list(_sheet_chunks(sheet))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMN_ORDER)
+    return pd.concat(chunks, ignore_index=True).infer_objects()
+
+def load_excel(path, sheet_name=None):
+    """
+    Load a sheet and return a DataFrame. Read the same way as
+    `iter_excel_chunks`, so it matches the streamed rows exactly (blank
+    lines dropped).
+    """
+
+    workbook = _open_workbook(path)
+    try:
+        return _sheet_frame(workbook[sheet_name] if sheet_name else workbook.worksheets[0])
+    finally:
+        workbook.close()
 
-    if df["Price"].isnull().any():
-        print("Warning: Some products have no price.")
-    
-    if (df["Price"] < 0).any():
-        print("Warning: Negative price found.")
+def iter_excel_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name=None):
+    """
+    Stream a sheet as DataFrames of at most `chunk_size` rows.
 
-def load_excel(path):
-    """Load Excel file and return a DataFrame."""
+    Uses openpyxl read-only mode, so only one chunk is held in memory at a
+    time. The header row is validated before any data rows are read.
+    Chunks are raw; run `clean_dataframe`/`add_computed_fields` on each.
+    """
 
+    workbook = _open_workbook(path)
     try:
-        df = pd.read_excel(path, engine='openpyxl')
-        return df
-    except Exception as e:
-        raise ValueError(f"Failed to load Excel: {e}")
-    
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        yield from _sheet_chunks(sheet, chunk_size)
+    finally:
+        workbook.close()
+
 def load_all_sheets(path):
-    """Load all sheets as a dict of DataFrames."""
+    """
+    Load every sheet from one read of the workbook.
 
+    Returns:
+        dict: sheet name -> DataFrame, or the ValueError explaining why the
+        sheet can't be used (empty, missing required columns).
+    """
+
+    workbook = _open_workbook(path)
+    sheets = {}
     try:
-        sheets = pd.read_excel(path, sheet_name=None, engine='openpyxl')
-        return sheets # dict: {sheet_name: DataFrame}
-    except Exception as e:
-        raise ValueError(f"Failed to load multiple sheets: {e}")
-    
+        for sheet in workbook.worksheets:
+            try:
+                sheets[sheet.title] = _sheet_frame(sheet)
+            except ValueError as e:
+                sheets[sheet.title] = e
+    finally:
+        workbook.close()
+    return sheets
+
 def clean_dataframe(df):
+    """
+    Normalise raw rows for rendering: strip text columns, coerce Price and
+    Stock to numbers. Bad values are coerced, not reported; run
+    `validation.Validator` on the raw rows first to find them.
+    """
 
     # Remove whitespace
     df.columns = df.columns.str.strip()
-    df["SKU"] = df["SKU"].astype(str).str.strip()
-    df["Name"] = df["Name"].astype(str).str.strip()
-    df["Description"] = df["Description"].astype(str).str.strip()
+    for column in ("SKU", "Name", "Description"):
+        df[column] = df[column].fillna("").astype(str).str.strip()
 
     # Convert Price to float and round to 2 decimals
-    df["Price"] = pd.to_numeric(df["Stock"], errors="coerce").round(2)
+    df["Price"] = pd.to_numeric(df["Price"], errors="coerce").round(2)
 
     # Convert stock to integer
     df["Stock"] = pd.to_numeric(df["Stock"], errors="coerce").fillna(0).astype(int)
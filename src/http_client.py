@@ -0,0 +1,56 @@
+"""
+src/http_client.py
+
+Shared, pooled HTTP session for the Slack and webhook notifiers.
+
+Connections are kept alive between posts, and transient failures
+(connection errors, 429 and 5xx responses) are retried with exponential
+backoff and jitter. Retry-After headers are honoured.
+"""
+
+
+import threading
+
+
+POOL_SIZE = 10
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+_session = None
+_lock = threading.Lock()
+
+
+def _build_session():
+
+    # Imported lazily: demo mode never touches the network
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry_options = dict(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,  # notifiers POST; retry those too
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        retry = Retry(backoff_jitter=BACKOFF_FACTOR, **retry_options)
+    except TypeError:
+        # urllib3 < 2 has no jitter option
+        retry = Retry(**retry_options)
+
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session():
+
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
@@ -4,81 +4,153 @@ src/interface.py
 
 
 import gradio as gr
-import pandas as pd
 import os
 import base64
-from datetime import datetime
-from pdf2image import convert_from_path
 from dotenv import load_dotenv
-from src.run_generators import generate_pdf_from_excel
-from src.sender import send_pdf_via_email
-from src.slack import post_to_slack
-from src.webhook import post_webhook_message
+from src.render_service import get_service, format_job, FINISHED
+from src.notify import notify, collect_results, format_results
+from src.preview import render_preview
+from src.validation import format_report
+from src import metrics
+from src import workbook_cache
 
 
 load_dotenv()
 
-TEMP_DIR = "temp"
-os.makedirs(TEMP_DIR, exist_ok=True)
+# How long a request waits for notifications before answering
+NOTIFY_WAIT_SECONDS = float(os.getenv("NOTIFY_WAIT_SECONDS", "2"))
+# How often a waiting request pushes a progress update
+PROGRESS_INTERVAL_SECONDS = float(os.getenv("PROGRESS_INTERVAL_SECONDS", "0.5"))
+# Rows shown in the preview table; only these are read on the request thread
+PREVIEW_TABLE_ROWS = int(os.getenv("PREVIEW_TABLE_ROWS", "200"))
+
+
+SHEET_CHOICES = {
+    "First sheet only": "first",
+    "All sheets, one PDF": "sections",
+    "All sheets, one PDF each": "separate",
+}
+
+LAYOUT_CHOICES = {
+    "Product cards": "cards",
+    "Price list table": "table",
+}
+
+
+def process_excel(file, email, slack, webhook, use_dummy, sheets="First sheet only", layout="Product cards"):
+    """
+    Submit the workbook to the render service and stream progress.
+
+    Yields `(preview table, status, pdf, gallery, job id)` updates. The
+    handler itself only waits, so renders for different users run side
+    by side in the service's worker pool.
+    """
+
+    run = metrics.RunMetrics("web")
+    input_path, error = _input_path(file, use_dummy)
+    if error:
+        yield _finish_request(run, None, error, None, [])
+        return
+
+    # Submitted before anything is parsed, so a large upload shows progress and can be cancelled
+    service = get_service()
+    sheet_mode = SHEET_CHOICES.get(sheets, "first")
+    # Render to memory: notifiers and the preview read the bytes directly
+    job_id = service.submit(
+        input_path, sheets=sheet_mode, layout=LAYOUT_CHOICES.get(layout, "cards"), in_memory=sheet_mode != "separate"
+    )
+    job = service.get(job_id)
+    yield None, format_job(job), None, [], job_id
+
+    # Metrics are collected in steps: a generator may resume on another thread
+    with metrics.collect(run=run):
+        df = _preview_table(input_path)
+
+    job = service.get(job_id)
+    while job is not None and job["status"] not in FINISHED:
+        yield df, format_job(job), None, [], job_id
+        job = service.wait(job_id, timeout=PROGRESS_INTERVAL_SECONDS)
+
+    if job is None or job["status"] != "done":
+        yield _finish_request(run, df, format_job(job) if job else "Job expired.", None, [])
+        return
+
+    with metrics.collect(run=run):
+        # Fold the worker's render timings into this request's run
+        if job["result"]["metrics"]:
+            run.merge(job["result"]["metrics"])
+        status, gallery_paths = _deliver(job["output"], email, slack, webhook)
+    if job["result"]["skipped"]:
+        status += "\n♻️ Same workbook and options as an earlier run; reused that PDF."
+    report = job["result"]["validation"]
+    if report and report["issues"]:
+        status += f"\n⚠️ Data issues in {report['invalid_rows']} of {report['rows']} rows:\n" + "\n".join(format_report(report))
+
+    # Gradio serves downloads from a file, so the PDF is written once, here
+    yield _finish_request(run, df, status, service.save_output(job_id), gallery_paths)
+
+def cancel_job(job_id):
+
+    if job_id and get_service().cancel(job_id):
+        return "🛑 Cancelling…"
+    return gr.update()
+
+def _finish_request(run, df, status, output_pdf, gallery_paths):
 
+    failed = output_pdf is None
+    metrics.export(run.snapshot(status="error" if failed else "ok", source="web"))
+    if run.stages:
+        status = f"{status}\n\n{run.summary()}"
+    return df, status, output_pdf, gallery_paths, None
 
-def process_excel(file, email, slack, webhook, use_dummy):
+def _input_path(file, use_dummy):
+    """Returns `(input path, error)`."""
 
     if use_dummy:
-        input_path = "data/sample_products.xlsx"
-    elif file is not None:
+        return "data/sample_products.xlsx", None
+    if file is not None:
         # Gradio provides either .name or .tempfile; .name is widely supported
         input_path = getattr(file, "name", None) or getattr(file, "path", None)
         if not input_path or not os.path.exists(input_path):
-            return None, "Uploaded file path not found.", None, []
-    else:
-        return None, "Please upload a file or tick 'Use example file'.", None, []
-    
-    try:
-        df = pd.read_excel(input_path)
-    except Exception as e:
-        return None, f"Failed to read Excel: {e}", None, []
+            return None, "Uploaded file path not found."
+        return input_path, None
+    return None, "Please upload a file or tick 'Use example file'."
+
+def _preview_table(input_path):
+    """The first rows for the table, or None; a broken workbook is reported by the job."""
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_pdf = os.path.join(TEMP_DIR, f"product_sheet_{timestamp}.pdf")
     try:
-        generate_pdf_from_excel(input_path, output_pdf)
+        with metrics.span("preview_table"):
+            return workbook_cache.head(input_path, PREVIEW_TABLE_ROWS)
     except Exception as e:
-        return df, f"PDF generation error: {e}", None, []
-    
+        print(f"[Preview] Skipping table: {e}")
+        return None
+
+def _deliver(output_pdf, email, slack, webhook):
+    """Notify and render the preview for a finished PDF. Returns `(status, gallery paths)`."""
+
+    # Notifications run in the background while the preview renders
+    futures = notify(output_pdf, email=email, slack=slack, webhook=webhook)
+
     gallery_paths = []
     try:
-        pages = convert_from_path(output_pdf, first_page=1, last_page=2)
-        for idx, img in enumerate(pages, start=1):
-            img_path = os.path.join(TEMP_DIR, f"{timestamp}_preview_{idx}.jpg")
-            img.save(img_path, "JPEG")
-            gallery_paths.append(img_path)
+        with metrics.span("preview"):
+            gallery_paths = render_preview(output_pdf[0] if isinstance(output_pdf, list) else output_pdf)
     except Exception as e:
         # Don't fail the whole run; just skip preview
         print(f"[Preview] Skipping preview: {e}")
         gallery_paths = []
 
     status_lines = ["✅ PDF generated."]
-    if email:
-        try:
-            ok, msg = send_pdf_via_email(output_pdf)
-            status_lines.append(("✅ " if ok else "⚠️ ") + msg)
-        except Exception as e:
-            status_lines.append(f"⚠️ Email skipped: {e}")
-    if slack:
-        try:
-            ok, msg = post_to_slack(output_pdf)
-            status_lines.append(("✅ " if ok else "⚠️ ") + msg)
-        except Exception as e:
-            status_lines.append(f"⚠️ Slack skipped: {e}")
-    if webhook:
-        try:
-            ok, msg = post_webhook_message(os.getenv("WEBHOOK_URL"), output_pdf)
-            status_lines.append(("✅ " if ok else "⚠️ ") + msg)
-        except Exception as e:
-            status_lines.append(f"⚠️ Webhook skipped: {e}")
-
-    return df, "\n".join(status_lines), output_pdf, gallery_paths
+    if futures:
+        # Don't hold the response for slow endpoints; late results go to the log
+        results = collect_results(futures, timeout=NOTIFY_WAIT_SECONDS)
+        status_lines.extend(format_results(results))
+        for name, future in futures.items():
+            if results[name] is None:
+                future.add_done_callback(lambda f, name=name: print(f"[Notify] {name}: {f.result()[1]}"))
+
+    return "\n".join(status_lines), gallery_paths
 
 with gr.Blocks(title="PDF Generator Interface") as demo:
     gr.Markdown("PDF Product Sheet Generator - Nested{Loop}")
@@ -90,19 +162,26 @@ with gr.Blocks(title="PDF Generator Interface") as demo:
         email_box = gr.Checkbox(label="Send Email")
         slack_box = gr.Checkbox(label="Post to Slack")
         webhook_box = gr.Checkbox(label="Trigger Webhook")
+        sheets_box = gr.Dropdown(label="Sheets", choices=list(SHEET_CHOICES), value="First sheet only")
+        layout_box = gr.Dropdown(label="Layout", choices=list(LAYOUT_CHOICES), value="Product cards")
 
     preview = gr.Dataframe(label="Excel Preview")
     status = gr.Textbox(label="Status", lines=6)
     download = gr.File(label="Download PDF")
     image_preview = gr.Gallery(label="PDF Preview Pages")
 
-    generate_btn = gr.Button("Generate PDF")
+    job_id = gr.State(None)
+
+    with gr.Row():
+        generate_btn = gr.Button("Generate PDF")
+        cancel_btn = gr.Button("Cancel")
 
     generate_btn.click(
         fn=process_excel,
-        inputs=[file_input, email_box, slack_box, webhook_box, use_dummy],
-        outputs=[preview, status, download, image_preview],
+        inputs=[file_input, email_box, slack_box, webhook_box, use_dummy, sheets_box, layout_box],
+        outputs=[preview, status, download, image_preview, job_id],
     )
+    cancel_btn.click(fn=cancel_job, inputs=[job_id], outputs=[status])
 
 
 if __name__ == "__main__":
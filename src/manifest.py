@@ -0,0 +1,115 @@
+"""
+src/manifest.py
+
+Build manifest for incremental folder builds.
+
+The manifest lives in the output folder and records, for every generated
+PDF, the content hash of the workbook it came from and the template
+fingerprint it was built with. A PDF is only rebuilt when either changed.
+"""
+
+
+import hashlib
+import json
+import os
+
+
+MANIFEST_NAME = ".build_manifest.json"
+
+# Anything that changes how a workbook is turned into a PDF
+FINGERPRINT_FILES = [
+    "src/excel_parser.py",
+    "src/pdf_generator.py",
+    "src/records.py",
+    "src/run_generators.py",
+    "src/card_layout.py",
+    "src/pagination.py",
+    "src/table_layout.py",
+    "templates/fonts/Lexend-Regular.ttf",
+    "templates/fonts/Lexend-Bold.ttf",
+    "templates/logo.png",
+]
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def template_fingerprint(files=None, layout: str = "cards") -> str:
+    """Hash of the renderer source, fonts and logo (and the layout, unless it's the default)."""
+
+    digest = hashlib.sha256()
+    for path in files or FINGERPRINT_FILES:
+        digest.update(path.encode())
+        digest.update(file_hash(path).encode() if os.path.exists(path) else b"missing")
+    if layout != "cards":
+        digest.update(layout.encode())
+    return digest.hexdigest()
+
+def load_manifest(output_folder: str) -> dict:
+
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # A corrupt manifest only costs a full rebuild
+        return {}
+
+def save_manifest(output_folder: str, manifest: dict) -> None:
+
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def is_fresh(manifest: dict, output_path: str, source_hash: str, fingerprint: str) -> bool:
+
+    entry = manifest.get(os.path.basename(output_path))
+    return (
+        entry is not None
+        and entry.get("hash") == source_hash
+        and entry.get("template") == fingerprint
+        and os.path.exists(output_path)
+    )
+
+def record_build(manifest: dict, excel_path: str, output_path: str, source_hash: str, fingerprint: str, result: dict) -> None:
+
+    manifest[os.path.basename(output_path)] = {
+        "source": os.path.abspath(excel_path),
+        "hash": source_hash,
+        "template": fingerprint,
+        "rows": result["rows"],
+        "pages": result["pages"],
+    }
+
+def forget_build(manifest: dict, output_path: str) -> None:
+
+    manifest.pop(os.path.basename(output_path), None)
+
+def remove_orphans(manifest: dict, output_folder: str) -> list[str]:
+    """
+    Delete PDFs whose source workbook is gone.
+
+    Only outputs recorded in the manifest are touched, so hand-placed files
+    in the output folder are left alone.
+    """
+
+    removed = []
+    for output_name, entry in list(manifest.items()):
+        if entry.get("source") and os.path.exists(entry["source"]):
+            continue
+        output_path = os.path.join(output_folder, output_name)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+            removed.append(output_path)
+        del manifest[output_name]
+    return removed
@@ -0,0 +1,286 @@
+"""
+src/metrics.py
+
+Stage timings and counters for generation runs.
+
+Code marks stages with `span("render")` and counts with `count("rows", n)`.
+Both are no-ops unless a run is being collected:
+
+    with metrics.collect() as run:
+        generate_pdf_from_excel(...)
+    metrics.export(run.snapshot())
+
+`export` appends the run to a daily JSON lines file (`runs-YYYY-MM-DD.jsonl`)
+and rewrites a Prometheus-style text file with all-time totals. The CLI,
+watcher and web app share the directory, so the totals cover every
+process and don't reset when one restarts. They are kept in
+`totals.json` with how far into the log they have been folded, so an
+export only reads the lines added since, and old daily logs can be
+pruned (see `retention`) without losing them.
+"""
+
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+METRICS_DIR = os.getenv("METRICS_DIR", "outputs/metrics")
+METRICS_PROM = os.path.join(METRICS_DIR, "metrics.prom")
+METRICS_TOTALS = os.path.join(METRICS_DIR, "totals.json")
+
+_current = contextvars.ContextVar("run_metrics", default=None)
+
+# Serializes exports within a process; across processes the totals are
+# a function of the log, so concurrent writers agree
+_totals_lock = threading.Lock()
+
+
+class RunMetrics:
+    """Accumulated stage timings and counters for one run."""
+
+    def __init__(self, name: str = ""):
+
+        self.run_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.stages = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(float)
+        # Notifications record into the run from worker threads
+        self._lock = threading.Lock()
+
+    def add_time(self, stage: str, seconds: float) -> None:
+
+        with self._lock:
+            self.stages[stage] += seconds
+            self.calls[stage] += 1
+
+    def count(self, name: str, value: float = 1) -> None:
+
+        with self._lock:
+            self.counters[name] += value
+
+    def merge(self, snapshot: dict) -> None:
+        """Fold in a snapshot collected elsewhere (e.g. a worker process)."""
+
+        with self._lock:
+            for stage, seconds in snapshot["stages"].items():
+                self.stages[stage] += seconds
+                self.calls[stage] += snapshot["calls"].get(stage, 1)
+            for name, value in snapshot["counters"].items():
+                self.counters[name] += value
+
+    def snapshot(self, **labels) -> dict:
+
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self._start, 4),
+            "stages": {stage: round(seconds, 4) for stage, seconds in self.stages.items()},
+            "calls": dict(self.calls),
+            "counters": {name: _number(value) for name, value in self.counters.items()},
+            **labels,
+        }
+
+    def summary(self) -> str:
+        """Per-stage breakdown for status boxes and logs."""
+
+        total = time.perf_counter() - self._start
+        lines = [f"⏱ {total:.2f}s total"]
+        for stage, seconds in sorted(self.stages.items(), key=lambda item: -item[1]):
+            share = seconds / total if total else 0
+            lines.append(f"  {stage:<16} {seconds:7.3f}s {share:4.0%}")
+        if self.counters:
+            lines.append("  " + ", ".join(f"{name}={_number(value)}" for name, value in sorted(self.counters.items())))
+        return "\n".join(lines)
+
+
+def _number(value):
+
+    return int(value) if float(value).is_integer() else round(value, 4)
+
+def current():
+
+    return _current.get()
+
+@contextmanager
+def collect(name: str = "", run: RunMetrics | None = None):
+    """
+    Collect spans and counters from this thread into a `RunMetrics`.
+
+    Nested calls join the run that is already being collected, so a caller
+    can wrap generation and notifications in one run. Passing `run` resumes
+    collecting into an existing run (e.g. across the steps of a streamed
+    web request, which may run on different threads).
+    """
+
+    active = _current.get()
+    if active is not None:
+        yield active
+        return
+
+    run = run or RunMetrics(name)
+    token = _current.set(run)
+    try:
+        yield run
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def span(stage: str):
+
+    run = _current.get()
+    if run is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add_time(stage, time.perf_counter() - start)
+
+def count(name: str, value: float = 1) -> None:
+
+    run = _current.get()
+    if run is not None:
+        run.count(name, value)
+
+def timed(stage: str):
+    """Decorator form of `span`."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _log_name(day=None) -> str:
+
+    day = day or datetime.now(timezone.utc).date()
+    return f"runs-{day.isoformat()}.jsonl"
+
+def _load_totals() -> dict:
+
+    try:
+        with open(METRICS_TOTALS) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"log": None, "offset": 0, "runs": {}, "stage_seconds": {}, "stage_calls": {}, "counters": {}}
+
+def _fold(totals: dict, record: dict) -> None:
+
+    def add(group, key, value):
+        totals[group][key] = totals[group].get(key, 0) + value
+
+    add("runs", record.get("status", "ok"), 1)
+    for stage, seconds in record["stages"].items():
+        add("stage_seconds", stage, seconds)
+        add("stage_calls", stage, record["calls"].get(stage, 1))
+    for name, value in record["counters"].items():
+        add("counters", name, value)
+
+def _fold_log(totals: dict) -> None:
+    """Fold lines of `totals["log"]` past `totals["offset"]`."""
+
+    try:
+        with open(os.path.join(METRICS_DIR, totals["log"]), "rb") as f:
+            f.seek(totals["offset"])
+            data = f.read()
+    except OSError:
+        # Pruned already
+        return
+    # Leave a line another process is still writing for next time
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        try:
+            _fold(totals, json.loads(line))
+        except (ValueError, KeyError):
+            continue
+    totals["offset"] += end
+
+def _catch_up(log_name: str) -> dict:
+    """The saved totals, brought up to date with the log (from every process)."""
+
+    totals = _load_totals()
+    if totals["log"] is not None and totals["log"] < log_name:
+        # Finish the previous day's log, then move on; an older name means another process moved on already
+        _fold_log(totals)
+        totals["log"], totals["offset"] = log_name, 0
+    elif totals["log"] is None:
+        totals["log"] = log_name
+    if totals["log"] == log_name:
+        _fold_log(totals)
+    return totals
+
+def _write(path: str, text: str) -> None:
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def export(record: dict) -> None:
+    """Append a run snapshot to today's JSON lines log and refresh the totals and Prometheus file."""
+
+    if not record:
+        return
+
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        log_name = _log_name()
+        with open(os.path.join(METRICS_DIR, log_name), "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+        with _totals_lock:
+            totals = _catch_up(log_name)
+            _write(METRICS_TOTALS, json.dumps(totals))
+        _write(METRICS_PROM, render_prometheus(totals, record))
+    except OSError as e:
+        # Metrics must never break a run
+        print(f"[Metrics] Export failed: {e}")
+
+def render_prometheus(totals: dict, last_run: dict | None = None) -> str:
+    """Prometheus text exposition of the logged totals (and the last run, if given)."""
+
+    lines = [
+        "# HELP pdfgen_runs_total Generation runs by status.",
+        "# TYPE pdfgen_runs_total counter",
+    ]
+    lines += [f'pdfgen_runs_total{{status="{status}"}} {n}' for status, n in sorted(totals["runs"].items())]
+
+    lines += [
+        "# HELP pdfgen_stage_seconds_total Time spent per pipeline stage.",
+        "# TYPE pdfgen_stage_seconds_total counter",
+    ]
+    lines += [f'pdfgen_stage_seconds_total{{stage="{stage}"}} {seconds:.4f}' for stage, seconds in sorted(totals["stage_seconds"].items())]
+
+    lines += [
+        "# HELP pdfgen_stage_calls_total Number of times each stage ran.",
+        "# TYPE pdfgen_stage_calls_total counter",
+    ]
+    lines += [f'pdfgen_stage_calls_total{{stage="{stage}"}} {n}' for stage, n in sorted(totals["stage_calls"].items())]
+
+    for name, value in sorted(totals["counters"].items()):
+        lines += [f"# TYPE pdfgen_{name}_total counter", f"pdfgen_{name}_total {_number(value)}"]
+
+    if last_run:
+        lines += [
+            "# HELP pdfgen_last_run_stage_seconds Stage timings of the most recent run.",
+            "# TYPE pdfgen_last_run_stage_seconds gauge",
+        ]
+        lines += [f'pdfgen_last_run_stage_seconds{{stage="{stage}"}} {seconds}' for stage, seconds in sorted(last_run["stages"].items())]
+
+    return "\n".join(lines) + "\n"
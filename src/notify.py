@@ -0,0 +1,112 @@
+"""
+src/notify.py
+
+Concurrent notification fan-out.
+
+Email, Slack and webhook run in parallel on a shared thread pool, so the
+caller waits for the slowest channel at most once (or not at all). Slack
+and webhook retry at the HTTP layer (see `src/http_client.py`); email is
+retried here with exponential backoff and jitter when the SMTP exchange
+itself fails.
+"""
+
+
+import contextvars
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from src.sender import send_pdf_via_email
+from src.slack import post_to_slack
+from src.webhook import post_webhook_message
+from src.pdf_output import pdf_name
+
+
+MAX_WORKERS = 8
+EMAIL_ATTEMPTS = 3
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="notify")
+
+
+def _email_is_transient(result) -> bool:
+
+    # Missing credentials or attachment, or a 5xx rejection ("Email rejected"), will not fix themselves
+    ok, msg = result
+    return not ok and msg.startswith("Email failed")
+
+def _with_retries(name, fn, args, kwargs, attempts=1, retry_if=None):
+    """Call a notifier, retrying exceptions and `retry_if(result)` failures."""
+
+    delay = BASE_DELAY
+    for attempt in range(1, attempts + 1):
+        try:
+            result = fn(*args, **kwargs)
+            retryable = bool(retry_if and retry_if(result))
+        except Exception as e:
+            result = (False, f"{name} failed: {e}")
+            retryable = True
+
+        if result[0] or not retryable or attempt == attempts:
+            return result
+
+        time.sleep(min(MAX_DELAY, delay) * random.uniform(0.5, 1.5))
+        delay *= 2
+
+def _submit(name, fn, *args, attempts=1, retry_if=None, **kwargs):
+
+    # Carry the caller's metrics run into the worker thread
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, _with_retries, name, fn, args, kwargs, attempts, retry_if)
+
+def notify(pdf_path, email: bool = False, slack: bool = False, webhook: bool = False, webhook_url: str | None = None, message: str | None = None, payload: dict | None = None) -> dict:
+    """
+    Start the selected notifications and return immediately.
+
+    `pdf_path` is a path or an in-memory `PDFBuffer`, or a list of them
+    (e.g. one PDF per sheet): email then carries every file in one
+    message, and Slack/webhook post once per file.
+
+    `message` replaces the default email body and Slack text (e.g. a
+    summary of catalogue changes); `payload` is merged into webhook bodies.
+
+    Returns:
+        dict: channel name -> Future resolving to `(ok, message)`.
+    """
+
+    pdf_paths = list(pdf_path) if isinstance(pdf_path, (list, tuple)) else [pdf_path]
+    webhook_url = webhook_url or os.getenv("WEBHOOK_URL")
+
+    futures = {}
+    if email:
+        futures["Email"] = _submit("Email", send_pdf_via_email, pdf_path, body=message, attempts=EMAIL_ATTEMPTS, retry_if=_email_is_transient)
+    for path in pdf_paths:
+        suffix = f" ({pdf_name(path)})" if len(pdf_paths) > 1 else ""
+        if slack:
+            futures["Slack" + suffix] = _submit("Slack", post_to_slack, path, text=message)
+        if webhook:
+            futures["Webhook" + suffix] = _submit("Webhook", post_webhook_message, webhook_url, path, payload_extra=payload)
+    return futures
+
+def collect_results(futures: dict, timeout: float | None = None) -> dict:
+    """
+    Wait up to `timeout` seconds (None = until done) for notifications.
+
+    Returns:
+        dict: channel name -> `(ok, message)`, or None if still running.
+    """
+
+    wait(list(futures.values()), timeout=timeout)
+    return {name: future.result() if future.done() else None for name, future in futures.items()}
+
+def format_results(results: dict) -> list[str]:
+
+    lines = []
+    for name, result in results.items():
+        if result is None:
+            lines.append(f"⏳ {name} still sending in the background.")
+        else:
+            ok, msg = result
+            lines.append(("✅ " if ok else "⚠️ ") + msg)
+    return lines
@@ -0,0 +1,14 @@
+"""
+src/options.py
+
+Run options shared by the CLI, web UI and renderer.
+
+Kept free of imports so `main.py` can build its argument parser without
+loading pandas or fpdf.
+"""
+
+
+# "first": first sheet only, "sections": every sheet in one PDF, "separate": one PDF per sheet
+SHEET_MODES = ("first", "sections", "separate")
+# "cards": one boxed card per product, "table": dense multi-column price list
+LAYOUTS = ("cards", "table")
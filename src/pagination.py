@@ -0,0 +1,107 @@
+"""
+src/pagination.py
+
+Measurement and page placement shared by the layout engines.
+
+Layouts run in two passes: first every block is measured (wrapped into
+lines with cached string widths, which gives its exact height), then
+`paginate` assigns blocks to pages. Only then is anything drawn, so
+blocks never straddle a page break and the page count is known before
+the first block is drawn.
+"""
+
+
+class LineWrapper:
+    """
+    Word-wraps text the way it will be drawn, with results cached.
+
+    Widths and wrapped lines are cached per font, so descriptions that
+    repeat across a catalogue are measured once. Uses whatever font is
+    currently set on `pdf`.
+    """
+
+    def __init__(self, pdf):
+
+        self.pdf = pdf
+        self._widths = {}
+        self._wraps = {}
+
+    def _font_key(self) -> tuple:
+
+        pdf = self.pdf
+        return (pdf.font_family, pdf.font_style, pdf.font_size_pt)
+
+    def width(self, text: str) -> float:
+
+        key = (self._font_key(), text)
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = self.pdf.get_string_width(text)
+        return width
+
+    def wrap(self, text: str, width: float) -> list[str]:
+        """Greedy word wrap of `text` into lines no wider than `width`; newlines are kept."""
+
+        key = (self._font_key(), text, width)
+        lines = self._wraps.get(key)
+        if lines is not None:
+            return lines
+
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(self._wrap_paragraph(paragraph, width))
+        self._wraps[key] = lines
+        return lines
+
+    def _wrap_paragraph(self, text: str, width: float) -> list[str]:
+
+        lines = []
+        line, line_width = "", 0.0
+        space = self.width(" ")
+        for word in text.split():
+            word_width = self.width(word)
+            if line and line_width + space + word_width <= width:
+                line, line_width = f"{line} {word}", line_width + space + word_width
+                continue
+            if line:
+                lines.append(line)
+
+            # A single word wider than the column is split by character
+            while word_width > width and len(word) > 1:
+                cut = len(word) - 1
+                while cut > 1 and self.pdf.get_string_width(word[:cut]) > width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = self.width(word)
+            line, line_width = word, word_width
+
+        lines.append(line)
+        return lines
+
+
+def paginate(heights, y: float, top: float, bottom: float, overhang: float = 0) -> list[list[int]]:
+    """
+    Place blocks on pages in order (next-fit bin packing).
+
+    Parameters:
+        heights (list[float]): Height of each block.
+        y (float): Cursor position on the current page.
+        top (float): Where the first block of a new page starts.
+        bottom (float): Lowest point a block may reach.
+        overhang (float): Extra space a block draws below its height (e.g. a border).
+
+    Returns:
+        list[list[int]]: Block indexes per page; the first list is the
+        current page and may be empty if nothing more fits on it. A block
+        taller than a whole page gets a page to itself.
+    """
+
+    pages = [[]]
+    for index, height in enumerate(heights):
+        if y + height + overhang > bottom and y > top:
+            pages.append([])
+            y = top
+        pages[-1].append(index)
+        y += height
+    return pages
@@ -3,8 +3,10 @@ src/pdf_generator.py
 """
 
 
+import os
 from fpdf import FPDF
-from datetime import datetime
+from datetime import datetime, timezone
+from src import resources
 
 
 # Brand Colours
@@ -14,14 +16,36 @@ BRAND_BLUE =   (3, 52, 110) # 03346e
 ZEBRA_GRAY =   (245, 245, 245)
 
 
+def default_build_date() -> datetime:
+    """
+    Date stamped into PDFs (footer and creation date): `SOURCE_DATE_EPOCH`
+    if set, else today at midnight UTC. Day resolution, so the same inputs
+    build byte-identical PDFs all day.
+    """
+
+    epoch = os.getenv("SOURCE_DATE_EPOCH")
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), timezone.utc)
+    today = datetime.now(timezone.utc).date()
+    return datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+
+
 class ProductSheetPDF(FPDF):
 
-    def __init__(self):
+    def __init__(self, first_page=1, build_date=None):
         super(). __init__()
         self.set_auto_page_break(auto=True, margin=15)
 
-        self.add_font("Helvetica", "", "templates/fonts/Lexend-Regular.ttf", uni=True)
-        self.add_font("Helvetica", "B", "templates/fonts/Lexend-Bold.ttf", uni=True)
+        # Instead of fpdf's per-second timestamp, so output bytes are reproducible
+        self.build_date = build_date or default_build_date()
+        self.set_creation_date(self.build_date)
+
+        # Page number of this document's first page within the final PDF,
+        # for shards rendered separately and merged afterwards
+        self.first_page = first_page
+
+        self.add_font("Helvetica", "", "templates/fonts/Lexend-Regular.ttf")
+        self.add_font("Helvetica", "B", "templates/fonts/Lexend-Bold.ttf")
         self.set_font("Helvetica", "", 12)
 
 
@@ -30,15 +54,36 @@ class ProductSheetPDF(FPDF):
         self.add_page()
         self.set_fill_color(240, 240, 255)
         self.rect(0, 0, self.w, self.h, style='F')
-        self.image("templates/logo.png", x=10, y=8, w=20)
+        resources.image(self, "templates/logo.png", x=10, y=8, w=20)
         self.set_text_color(*BRAND_PURPLE)
         self.set_font("Helvetica", "B", 28)
         self.set_y(110)
         self.cell(0, 20, title, align="C", ln=True)
     
+    def table_of_contents(self, entries):
+        """List `(title, page)` entries on a new page."""
+
+        self.add_page()
+        self.set_text_color(*BRAND_PURPLE)
+        self.set_font("Helvetica", "B", 18)
+        self.cell(0, 12, "Contents", ln=True)
+        self.ln(4)
+
+        self.set_text_color(0, 0, 0)
+        self.set_font("Helvetica", "", 12)
+        for title, page in entries:
+            self.set_x(15)
+            self.cell(160, 9, title)
+            self.cell(0, 9, str(page), ln=True, align="R")
+    
+    def page_number(self) -> int:
+        """Page number in the final (merged) document."""
+
+        return self.first_page + self.page_no() - 1
+
     def header(self):
 
-        if self.page_no() == 1:
+        if self.page_number() == 1:
             return
         
         self.set_font("Helvetica", "B", 16)
@@ -48,47 +93,59 @@ class ProductSheetPDF(FPDF):
 
     def footer(self):
 
-        if self.page_no() == 1:
+        if self.page_number() == 1:
             return
         
         self.set_y(-15)
         self.set_font("Helvetica", "", 8)
         self.set_text_color(100, 100, 100)
-        self.cell(0, 10, f"Millie Jackson | nestedloop.ai | {datetime.now().strftime('%Y-%m-%d')}", 0, 0, "C")
+        self.cell(0, 10, f"Millie Jackson | nestedloop.ai | {self.build_date.strftime('%Y-%m-%d')}", 0, 0, "C")
+
+    @property
+    def content_top(self) -> float:
+        """Where `header()` leaves the cursor on a product page."""
+
+        return self.t_margin + 25
 
-    def add_product_block(self, product: dict, stripe: bool = False):
+    def add_product_block(self, record, label_lines, description_lines):
+        """
+        Draw one product card from a pre-formatted `ProductRecord`.
 
-        fill = stripe
-        self.set_fill_color(*ZEBRA_GRAY if fill else (255, 255, 255))
+        Text comes pre-wrapped from `CardLayout.measure`, so the card is drawn
+        line by line and its height is exactly what pagination planned for.
+        """
+
+        self.set_fill_color(*ZEBRA_GRAY if record.stripe else (255, 255, 255))
         self.set_text_color(0, 0, 0)
         self.set_font("Helvetica", "", 12)
         self.cell(0, 10, "", ln=True)
 
         y_start = self.get_y()
-        self.set_x(15)
 
         # Name and SKU
         self.set_font("Helvetica", "B", 13)
         self.set_text_color(*BRAND_TEAL)
-        self.multi_cell(0, 8, f"{product['Name']} ({product['SKU']})", border=0, align='L', fill=True)
+        for line in label_lines:
+            self.set_x(15)
+            self.cell(0, 8, line, ln=True, fill=True)
         
         # Description
         self.set_font("Helvetica", "", 11)
         self.set_text_color(0, 0, 0)
-        self.set_x(15)
-        self.multi_cell(0, 8, product["Description"], border=0, align='L')
+        for line in description_lines:
+            self.set_x(15)
+            self.cell(0, 8, line, ln=True)
 
         # Price
         self.set_x(15)
-        self.cell(0, 8, f"Price: £{product['Price']:.2f}", ln=True)
-        if "PriceWithVAT" in product:
+        self.cell(0, 8, record.price, ln=True)
+        if record.price_with_vat is not None:
             self.set_x(15)
-            self.cell(0, 8, f"Price (with VAT): £{product['PriceWithVAT']:.2f}", ln=True)
+            self.cell(0, 8, record.price_with_vat, ln=True)
 
         self.set_x(15)
-        self.cell(0, 8, f"In Stock: {product['Stock']}", ln=True) 
+        self.cell(0, 8, record.stock, ln=True) 
 
         # Border box
         y_end = self.get_y()
-        self.rect(x=10, y=y_start - 2, w=190, h=(y_end - y_start + 10))  
-                  
\ No newline at end of file
+        self.rect(x=10, y=y_start - 2, w=190, h=(y_end - y_start + 10))
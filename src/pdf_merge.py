@@ -0,0 +1,44 @@
+"""
+src/pdf_merge.py
+
+Concatenate partial PDFs (sections, shards) into one document.
+"""
+
+
+import os
+from src.pdf_output import atomic_path
+
+
+def merge_pdfs(parts, output_path, outline=None) -> int:
+    """
+    Append `parts` in order and write the result to `output_path`.
+
+    Parameters:
+        parts (list[str]): Paths of the partial PDFs.
+        output_path (str | file): Where to write the merged PDF (a path or a writable binary stream).
+        outline (list[str | None]): Optional bookmark title per part.
+
+    Returns:
+        int: Page count of the merged document.
+    """
+
+    # pypdf is only needed for multi-sheet and sharded runs; keep it off the CLI's start-up path
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for index, part in enumerate(parts):
+        title = outline[index] if outline else None
+        if title:
+            writer.append(part, outline_item=title)
+        else:
+            writer.append(part)
+
+    if isinstance(output_path, (str, os.PathLike)):
+        with atomic_path(output_path) as tmp_path, open(tmp_path, "wb") as f:
+            writer.write(f)
+    else:
+        writer.write(output_path)
+
+    pages = len(writer.pages)
+    writer.close()
+    return pages
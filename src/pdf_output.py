@@ -0,0 +1,100 @@
+"""
+src/pdf_output.py
+
+Where a rendered PDF goes: a file path, any writable binary stream, or
+(with no output given) an in-memory `PDFBuffer`.
+
+Notifiers and the preview accept either a path or a buffer, so the web
+and email paths can hand the rendered bytes straight on instead of
+writing a file and reading it back.
+"""
+
+
+import hashlib
+import io
+import os
+import threading
+from contextlib import contextmanager
+from src.manifest import file_hash
+
+
+class PDFBuffer(io.BytesIO):
+    """An in-memory PDF that carries a file name for attachments, uploads and downloads."""
+
+    def __init__(self, data: bytes = b"", name: str = "product_sheet.pdf"):
+
+        super().__init__(data)
+        self.name = name
+
+
+def is_path(pdf) -> bool:
+
+    return isinstance(pdf, (str, os.PathLike))
+
+def pdf_name(pdf) -> str:
+    """File name of a path or buffer."""
+
+    if is_path(pdf):
+        return os.path.basename(pdf)
+    return os.path.basename(getattr(pdf, "name", "product_sheet.pdf"))
+
+def pdf_bytes(pdf) -> bytes:
+    """Contents of a path or buffer."""
+
+    if is_path(pdf):
+        with open(pdf, "rb") as f:
+            return f.read()
+    if isinstance(pdf, io.BytesIO):
+        return pdf.getvalue()
+    return bytes(pdf)
+
+def pdf_digest(pdf) -> str:
+
+    if is_path(pdf):
+        return file_hash(pdf)
+    return hashlib.sha256(pdf_bytes(pdf)).hexdigest()
+
+@contextmanager
+def atomic_path(path):
+    """
+    Temp path next to `path`, moved over it once the block succeeds. Readers
+    never see a half-written PDF, and the folder's mtime changes with every
+    write (the scheduler's sent index relies on that).
+    """
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def save_pdf(pdf, output, name: str = "product_sheet.pdf"):
+    """
+    Write an FPDF document to `output` (a path, a writable stream, or None).
+
+    Returns:
+        tuple: `(output, bytes written)`; `output` is a new `PDFBuffer` when None was given.
+    """
+
+    if is_path(output):
+        with atomic_path(output) as tmp_path:
+            pdf.output(tmp_path)
+        return output, os.path.getsize(output)
+
+    data = bytes(pdf.output())
+    if output is None:
+        return PDFBuffer(data, name), len(data)
+    output.write(data)
+    return output, len(data)
+
+def describe(output) -> str:
+    """How to show an output in logs and result lines."""
+
+    if is_path(output):
+        return str(output)
+    if isinstance(output, list):
+        return ", ".join(describe(item) for item in output)
+    size = len(output.getvalue()) if isinstance(output, io.BytesIO) else None
+    return f"<in memory: {pdf_name(output)}{f', {size} bytes' if size is not None else ''}>"
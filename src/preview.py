@@ -0,0 +1,105 @@
+"""
+src/preview.py
+
+Page thumbnails for the web preview.
+
+Pages are rendered in-process with pypdfium2 when it is installed (no
+poppler subprocess, no re-parse per page), falling back to pdf2image.
+Thumbnails are cached by PDF content hash, so previewing the same output
+twice costs one hash. The cache is kept under a size/age budget in the
+background (see `src/retention.py`), not while a request waits.
+The PDF may be a path or an in-memory `PDFBuffer`; buffers are rendered
+from their bytes without being written out first.
+"""
+
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.pdf_output import is_path, pdf_bytes, pdf_digest
+
+
+PREVIEW_DIR = os.path.join("temp", "previews")
+PREVIEW_PAGES = int(os.getenv("PREVIEW_PAGES", "2"))
+PREVIEW_DPI = int(os.getenv("PREVIEW_DPI", "100"))
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "2"))
+PREVIEW_CACHE_MB = float(os.getenv("PREVIEW_CACHE_MB", "200"))
+PREVIEW_MAX_AGE_HOURS = float(os.getenv("PREVIEW_MAX_AGE_HOURS", "24"))
+
+_executor = None
+
+
+def _render_page(pdf_path, page_index: int, dpi: int, out_path: str) -> str | None:
+    """Render one page to a JPEG (runs in a worker process). `pdf_path` may also be the PDF's bytes."""
+
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        pdfium = None
+
+    if pdfium is not None:
+        document = pdfium.PdfDocument(pdf_path)
+        try:
+            if page_index >= len(document):
+                return None
+            image = document[page_index].render(scale=dpi / 72).to_pil()
+        finally:
+            document.close()
+    else:
+        from pdf2image import convert_from_bytes, convert_from_path
+        convert = convert_from_bytes if isinstance(pdf_path, bytes) else convert_from_path
+        pages = convert(pdf_path, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1)
+        if not pages:
+            return None
+        image = pages[0]
+
+    # Write then rename so a half-written file is never served from cache
+    tmp_path = out_path + ".tmp"
+    image.convert("RGB").save(tmp_path, "JPEG", quality=85)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def _get_executor():
+
+    global _executor
+    if _executor is None:
+        # Spawn, not fork: the web server is heavily threaded
+        _executor = ProcessPoolExecutor(max_workers=PREVIEW_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def shutdown() -> None:
+    """Stop the render pool (needed before exiting a multiprocessing child)."""
+
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+def render_preview(pdf_path, pages: int = PREVIEW_PAGES, dpi: int = PREVIEW_DPI, cache_dir: str = PREVIEW_DIR) -> list[str]:
+    """
+    Return JPEG paths for the first `pages` pages of `pdf_path`.
+
+    Cached thumbnails are reused; missing ones are rendered in parallel.
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = pdf_digest(pdf_path)[:16]
+    targets = [os.path.join(cache_dir, f"{digest}_{dpi}dpi_p{i + 1}.jpg") for i in range(pages)]
+
+    missing = [(i, path) for i, path in enumerate(targets) if not os.path.exists(path)]
+    if missing:
+        executor = _get_executor()
+        source = os.path.abspath(pdf_path) if is_path(pdf_path) else pdf_bytes(pdf_path)
+        futures = [executor.submit(_render_page, source, i, dpi, os.path.abspath(path)) for i, path in missing]
+        for future in futures:
+            future.result()
+
+    now = time.time()
+    paths = []
+    for path in targets:
+        if os.path.exists(path):
+            # Bump mtime so eviction is least-recently-used
+            os.utime(path, (now, now))
+            paths.append(path)
+    return paths
@@ -0,0 +1,97 @@
+"""
+src/records.py
+
+Pre-formatted product records for the PDF renderer.
+
+The cleaned DataFrame is turned into display-ready strings in one
+column-wise pass, so the render loop never builds a pandas Series per
+product or formats numbers one at a time.
+"""
+
+
+import numpy as np
+
+
+class ProductRecord:
+    """Everything `ProductSheetPDF.add_product_block` draws for one product (card layout)."""
+
+    __slots__ = ("label", "description", "price", "price_with_vat", "stock", "stripe")
+
+    def __init__(self, label, description, price, price_with_vat, stock, stripe):
+
+        self.label = label                     # "Name (SKU)"
+        self.description = description
+        self.price = price                     # "Price: £9.99"
+        self.price_with_vat = price_with_vat   # "Price (with VAT): £11.99" or None
+        self.stock = stock                     # "In Stock: 60"
+        self.stripe = stripe                   # zebra fill for the label row
+
+
+def _money(series):
+
+    return np.char.mod("%.2f", series.to_numpy(dtype=float))
+
+def _stripes(length: int, stripe_start: bool):
+
+    return ((np.arange(length) % 2 == 1) ^ stripe_start).tolist()
+
+def build_product_records(df, stripe_start: bool = False) -> list[ProductRecord]:
+    """
+    Build render records from a cleaned DataFrame.
+
+    Parameters:
+        df (DataFrame): Output of `clean_dataframe`/`add_computed_fields`.
+        stripe_start (bool): Stripe flag of the first row, so striping
+            carries on across chunks.
+    """
+
+    if df.empty:
+        return []
+
+    labels = df["Name"].astype(str) + " (" + df["SKU"].astype(str) + ")"
+    descriptions = df["Description"].astype(str)
+    prices = np.char.add("Price: £", _money(df["Price"]))
+    stocks = "In Stock: " + df["Stock"].astype(str)
+
+    if "PriceWithVAT" in df.columns:
+        vat_prices = np.char.add("Price (with VAT): £", _money(df["PriceWithVAT"])).tolist()
+    else:
+        vat_prices = [None] * len(df)
+
+    return [
+        ProductRecord(*fields)
+        for fields in zip(
+            labels.tolist(),
+            descriptions.tolist(),
+            prices.tolist(),
+            vat_prices,
+            stocks.tolist(),
+            _stripes(len(df), stripe_start),
+        )
+    ]
+
+def build_table_rows(df, stripe_start: bool = False) -> list[tuple]:
+    """
+    Build rows for the table layout (see `src/table_layout.py`).
+
+    Each row is `(cells, stripe)` where `cells` holds one plain string per
+    `TABLE_COLUMNS` entry: SKU, name, description, price, price with VAT, stock.
+    """
+
+    if df.empty:
+        return []
+
+    if "PriceWithVAT" in df.columns:
+        vat_prices = _money(df["PriceWithVAT"]).tolist()
+    else:
+        vat_prices = [""] * len(df)
+
+    cells = zip(
+        df["SKU"].astype(str).tolist(),
+        df["Name"].astype(str).tolist(),
+        df["Description"].astype(str).tolist(),
+        _money(df["Price"]).tolist(),
+        vat_prices,
+        df["Stock"].astype(str).tolist(),
+    )
+    return list(zip(cells, _stripes(len(df), stripe_start)))
@@ -0,0 +1,358 @@
+"""
+src/render_service.py
+
+Local render service: a job queue in front of a pool of render processes.
+
+Callers submit a workbook and get a job ID back straight away, then poll
+(or `wait`) for progress. Renders run in worker processes, so one huge
+workbook only occupies one worker while other jobs keep moving, and
+throughput grows with the worker count. Jobs can be cancelled while
+queued or between chunks while running. Finished jobs are kept for
+`RESULT_RETENTION_SECONDS`, after which they are forgotten and any output
+the service created for them is deleted.
+
+With reproducible builds on (the default), a service-owned output is
+content-addressed instead (see `src/artifacts.py`): resubmitting the same
+workbook with the same options finishes at once with the PDF built before.
+
+    service = get_service()
+    job_id = service.submit("data/sample_products.xlsx")
+    job = service.wait(job_id)
+    print(format_job(job))
+"""
+
+
+import atexit
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.run_generators import run_generation_job
+from src.pdf_output import is_path, pdf_name, pdf_bytes
+from src import artifacts
+from src import workbook_cache
+
+
+SERVICE_WORKERS = int(os.getenv("RENDER_SERVICE_WORKERS", str(os.cpu_count() or 1)))
+SERVICE_OUTPUT_DIR = os.getenv("RENDER_SERVICE_OUTPUT_DIR", os.path.join("temp", "jobs"))
+RESULT_RETENTION_SECONDS = float(os.getenv("RESULT_RETENTION_SECONDS", "3600"))
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+
+    pass
+
+
+def _run_job(job_id, excel_path, output_path, sheets, layout, render_workers, progress, cancelled) -> dict:
+    """Runs in a worker process; reports `(rows_done, total_rows)` through the shared `progress` dict."""
+
+    if job_id in cancelled:
+        raise JobCancelled(job_id)
+
+    # Total is only known up front when the sheet is already cached (e.g. by the web preview)
+    cached = workbook_cache.peek(excel_path) if sheets == "first" else None
+    total = len(cached) if cached is not None else None
+    progress[job_id] = (0, total)
+
+    def report(rows):
+        if job_id in cancelled:
+            raise JobCancelled(job_id)
+        progress[job_id] = (rows, total)
+
+    return run_generation_job(excel_path, output_path, sheets=sheets, layout=layout, workers=render_workers, progress=report)
+
+
+class RenderService:
+    """
+    Job queue plus render worker pool. Thread-safe; one instance per process
+    is enough (see `get_service`).
+
+    `workers=0` runs jobs one at a time on a thread in this process instead:
+    no worker start-up or second import of the renderer, which is what a
+    one-off CLI run wants.
+    """
+
+    def __init__(
+        self,
+        workers: int = SERVICE_WORKERS,
+        output_dir: str = SERVICE_OUTPUT_DIR,
+        retention: float = RESULT_RETENTION_SECONDS,
+        reproducible: bool = artifacts.REPRODUCIBLE_BUILDS,
+        artifact_dir: str = artifacts.ARTIFACT_DIR,
+    ):
+
+        self.output_dir = output_dir
+        self.retention = retention
+        self.reproducible = reproducible
+        self.artifact_dir = artifact_dir
+        if workers == 0:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+            self._manager = None
+            self._progress = {}
+            self._cancelled = {}
+        else:
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            # Shared with the workers: progress per job, and the IDs being cancelled
+            self._manager = context.Manager()
+            self._progress = self._manager.dict()
+            self._cancelled = self._manager.dict()
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Condition()
+
+    def submit(self, excel_path, output_path=None, sheets: str = "first", layout: str = "cards", render_workers: int | None = None, in_memory: bool = False) -> str:
+        """
+        Queue a render and return its job ID.
+
+        Without `output_path` the service picks one under `output_dir` and
+        owns it: the file is deleted when the job expires. With `in_memory`
+        nothing is written; the finished job's "output" is a `PDFBuffer`.
+        Reproducible services instead build (or reuse) a content-addressed
+        file under `artifact_dir`, which outlives the job.
+        """
+
+        self._expire()
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = artifact = None
+        if output_path is None and self.reproducible and sheets != "separate":
+            artifact = artifacts.artifact_path(self.artifact_dir, excel_path, artifacts.build_key(excel_path, sheets, layout))
+            built = artifacts.lookup(artifact)
+            if built is not None:
+                return self._reuse(job_id, excel_path, artifact, built)
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            output_path = f"{artifact}.{job_id}.tmp"
+        elif output_path is None:
+            job_dir = os.path.join(self.output_dir, job_id)
+            if not in_memory:
+                output_path = os.path.join(job_dir, "product_sheet.pdf")
+                os.makedirs(job_dir, exist_ok=True)
+
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "path": excel_path,
+            "output": output_path,
+            "dir": job_dir,
+            "artifact": artifact,
+            "rows": 0,
+            "total": None,
+            "submitted": time.time(),
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            future = self._pool.submit(
+                _run_job, job_id, excel_path, output_path, sheets, layout, render_workers, self._progress, self._cancelled
+            )
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def _reuse(self, job_id, excel_path, artifact, built) -> str:
+        """Register an already finished job for an existing artifact."""
+
+        now = time.time()
+        result = {
+            "path": excel_path,
+            "output": artifact,
+            "rows": built["rows"],
+            "pages": built["pages"],
+            "seconds": 0.0,
+            "error": None,
+            "skipped": True,
+            "validation": built["validation"],
+            "metrics": None,
+        }
+        job = {
+            "id": job_id,
+            "status": "done",
+            "path": excel_path,
+            "output": artifact,
+            "dir": None,
+            "artifact": artifact,
+            "rows": built["rows"],
+            "total": built["rows"],
+            "submitted": now,
+            "finished": now,
+            "result": result,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._lock.notify_all()
+        return job_id
+
+    def _finish(self, job_id, future) -> None:
+
+        if future.cancelled() or job_id in self._cancelled:
+            status, result, error = "cancelled", None, "Cancelled"
+        else:
+            try:
+                result = future.result()
+                error = result["error"]
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            status = "failed" if error else "done"
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is not None and job["artifact"]:
+            tmp_path = f"{job['artifact']}.{job_id}.tmp"
+            if status == "done":
+                try:
+                    artifacts.publish(tmp_path, job["artifact"], result)
+                    result["output"] = job["artifact"]
+                except OSError as e:
+                    status, error = "failed", f"{type(e).__name__}: {e}"
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            if job is not None:
+                job.update(status=status, result=result, error=error, finished=time.time())
+                if result is not None:
+                    job["rows"] = result["rows"]
+                    job["output"] = result["output"]
+            self._futures.pop(job_id, None)
+            self._progress.pop(job_id, None)
+            self._cancelled.pop(job_id, None)
+            self._lock.notify_all()
+
+        if status == "cancelled" and job is not None and job["dir"]:
+            shutil.rmtree(job["dir"], ignore_errors=True)
+
+    def get(self, job_id: str) -> dict | None:
+        """Snapshot of a job, with live progress for running ones; None once expired."""
+
+        self._expire()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+
+        if job["status"] == "queued":
+            progress = self._progress.get(job_id)
+            if progress is not None:
+                job["status"] = "running"
+                job["rows"], job["total"] = progress
+            else:
+                job["ahead"] = self._queued_before(job)
+        return job
+
+    def _queued_before(self, job) -> int:
+
+        with self._lock:
+            return sum(
+                1 for other in self._jobs.values()
+                if other["status"] == "queued" and other["submitted"] < job["submitted"] and other["id"] not in self._progress
+            )
+
+    def wait(self, job_id: str, timeout: float | None = None) -> dict | None:
+        """Block until the job finishes or `timeout` passes, then return `get(job_id)`."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while job_id in self._jobs and self._jobs[job_id]["status"] not in FINISHED:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or stop a running one at its next chunk. Returns False if already finished."""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return False
+            self._cancelled[job_id] = True
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return True
+
+    def save_output(self, job_id: str) -> str | None:
+        """
+        Path of a finished job's PDF, writing an in-memory result into the
+        job's directory first (for callers that need a file, like download links).
+        """
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "done":
+                return None
+            output = job["output"]
+            if is_path(output) or isinstance(output, list):
+                return output
+
+            path = os.path.join(job["dir"], pdf_name(output))
+            os.makedirs(job["dir"], exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(pdf_bytes(output))
+            return path
+
+    def jobs(self) -> list[dict]:
+
+        with self._lock:
+            job_ids = list(self._jobs)
+        return [job for job in map(self.get, job_ids) if job is not None]
+
+    def _expire(self) -> None:
+
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job["finished"] and job["finished"] < cutoff]
+            for job in expired:
+                del self._jobs[job["id"]]
+
+        for job in expired:
+            if job["dir"]:
+                shutil.rmtree(job["dir"], ignore_errors=True)
+
+    def shutdown(self) -> None:
+
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> RenderService:
+    """Process-wide service, started on first use and stopped at exit."""
+
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RenderService()
+            atexit.register(_service.shutdown)
+        return _service
+
+def format_job(job: dict) -> str:
+    """One-line status for progress displays."""
+
+    if job["status"] == "queued":
+        ahead = job.get("ahead", 0)
+        return f"⏳ Queued ({ahead} job{'s' if ahead != 1 else ''} ahead)" if ahead else "⏳ Queued"
+    if job["status"] == "running":
+        if job["total"]:
+            return f"🔄 Rendering: {job['rows']}/{job['total']} rows ({job['rows'] / job['total']:.0%})"
+        return f"🔄 Rendering: {job['rows']} rows"
+    if job["status"] == "done":
+        return f"✅ Done: {job['rows']} rows"
+    if job["status"] == "cancelled":
+        return "🛑 Cancelled"
+    return f"❌ Failed: {job['error']}"
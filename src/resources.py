@@ -0,0 +1,54 @@
+"""
+src/resources.py
+
+Process-level cache of decoded images shared by every `ProductSheetPDF`
+in the process (batch, watcher and web modes).
+
+Entries are keyed by absolute path and invalidated when the file's mtime
+changes. Anything the cache cannot handle falls back to the plain FPDF
+call, so a cache miss is only ever slower, never wrong.
+"""
+
+
+import copy
+import os
+
+
+_images = {}  # abs path -> (mtime, image info)
+
+
+def _mtime(path: str) -> int:
+
+    return os.stat(path).st_mtime_ns
+
+def clear_resource_cache() -> None:
+
+    _images.clear()
+
+def image(pdf, path: str, **kwargs):
+    """
+    Cached equivalent of `pdf.image(path, ...)`.
+
+    The decoded and compressed image data is kept per process and seeded
+    into each new document's image cache before drawing.
+    """
+
+    key = os.path.abspath(path)
+    mtime = _mtime(path)
+    cached = _images.get(key)
+    images = pdf.image_cache.images
+
+    if cached is not None and cached[0] == mtime and path not in images:
+        info = copy.copy(cached[1])
+        info["i"] = len(images) + 1
+        info["usages"] = 0
+        images[path] = info
+
+    result = pdf.image(path, **kwargs)
+
+    info = images.get(path)
+    if (cached is None or cached[0] != mtime) and info is not None and info.get("iccp_i") is None:
+        # ICC profiles are numbered per document, so those images are not shared
+        _images[key] = (mtime, copy.copy(info))
+
+    return result
@@ -0,0 +1,247 @@
+"""
+src/retention.py
+
+Disk retention for the working directories.
+
+Each directory has a policy: a maximum age, total size and/or file
+count. Past the limits the oldest entries go first, either deleted
+(previews, job scratch dirs, cached builds, daily metrics logs) or, for
+`outputs/`, moved into monthly zip bundles under `outputs/archive/`.
+That keeps the directories the scheduler and watcher scan small.
+
+Compaction runs on a background thread (`start_background`), never in a
+request, and can be run once by hand with `python main.py cleanup`.
+Nothing modified in the last `RETENTION_GRACE_SECONDS` is touched, nor
+are PDFs the scheduler hasn't emailed yet or current folder builds.
+"""
+
+
+import os
+import shutil
+import threading
+import time
+import zipfile
+from datetime import datetime
+from src import manifest as build_manifest
+from src.sent_index import SENT_DB_FILE, unsent_paths
+
+
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "600"))
+RETENTION_GRACE_SECONDS = float(os.getenv("RETENTION_GRACE_SECONDS", "600"))
+
+OUTPUT_FOLDER = "outputs"
+OUTPUT_ARCHIVE_DAYS = float(os.getenv("OUTPUT_ARCHIVE_DAYS", "30"))
+OUTPUT_MAX_FILES = int(os.getenv("OUTPUT_MAX_FILES", "500"))
+ARTIFACT_MAX_AGE_DAYS = float(os.getenv("ARTIFACT_MAX_AGE_DAYS", "7"))
+ARTIFACT_MAX_MB = float(os.getenv("ARTIFACT_MAX_MB", "1024"))
+METRICS_LOG_DAYS = float(os.getenv("METRICS_LOG_DAYS", "30"))
+
+_started = None
+_lock = threading.Lock()
+
+
+def policy(path: str, max_age: float | None = None, max_mb: float | None = None, max_files: int | None = None, suffix: str | None = None, archive: bool = False) -> dict:
+    """
+    Limits for one directory. `max_age` is in seconds; `suffix` restricts
+    the policy to matching files; `archive` zips entries instead of deleting them.
+    """
+
+    return {"path": path, "max_age": max_age, "max_mb": max_mb, "max_files": max_files, "suffix": suffix, "archive": archive}
+
+def default_policies() -> list[dict]:
+
+    # Imported here so the scheduler doesn't load the renderer just to clean up
+    from src.preview import PREVIEW_DIR, PREVIEW_CACHE_MB, PREVIEW_MAX_AGE_HOURS
+    from src.artifacts import ARTIFACT_DIR
+    from src.metrics import METRICS_DIR
+
+    # Job dirs normally go when their job expires; this catches ones left by earlier processes
+    job_dir = os.getenv("RENDER_SERVICE_OUTPUT_DIR", os.path.join("temp", "jobs"))
+    job_max_age = 2 * float(os.getenv("RESULT_RETENTION_SECONDS", "3600"))
+
+    return [
+        policy(PREVIEW_DIR, max_age=PREVIEW_MAX_AGE_HOURS * 3600, max_mb=PREVIEW_CACHE_MB),
+        policy(job_dir, max_age=job_max_age),
+        policy(ARTIFACT_DIR, max_age=ARTIFACT_MAX_AGE_DAYS * 86400, max_mb=ARTIFACT_MAX_MB),
+        policy(OUTPUT_FOLDER, max_age=OUTPUT_ARCHIVE_DAYS * 86400, max_files=OUTPUT_MAX_FILES, suffix=".pdf", archive=True),
+        # Daily run logs; the all-time totals live in totals.json
+        policy(METRICS_DIR, max_age=METRICS_LOG_DAYS * 86400, suffix=".jsonl"),
+    ]
+
+def _size(path: str) -> int:
+
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _entries(folder: str, suffix: str | None) -> list[tuple]:
+    """`(mtime, size, path, companions)` oldest first. A `<name>.json` rides along with `<name>`."""
+
+    try:
+        scanned = {entry.name: entry for entry in os.scandir(folder)}
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    for name, entry in scanned.items():
+        if name.endswith(".json") and name[:-5] in scanned:
+            continue
+        if suffix and not name.endswith(suffix):
+            continue
+        if entry.is_dir() and suffix:
+            continue
+        try:
+            companions = [scanned[f"{name}.json"].path] if f"{name}.json" in scanned else []
+            size = _size(entry.path) + sum(os.path.getsize(path) for path in companions)
+            entries.append((entry.stat().st_mtime, size, entry.path, companions))
+        except OSError:
+            # Removed while scanning
+            continue
+    entries.sort()
+    return entries
+
+def _protected(rule: dict) -> set:
+    """Paths an archive policy must leave alone: unsent PDFs and current folder builds."""
+
+    if not rule["archive"]:
+        return set()
+    folder = rule["path"]
+    protected = {os.path.join(folder, name) for name, entry in build_manifest.load_manifest(folder).items()
+                 if entry.get("source") and os.path.exists(entry["source"])}
+    if os.path.normpath(os.path.dirname(SENT_DB_FILE)) == os.path.normpath(folder):
+        protected |= unsent_paths()
+    return protected
+
+def _unlink(path: str) -> None:
+
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        # Already gone (another sweep, or a cache miss rebuilding it)
+        pass
+
+def _remove(path: str, companions: list) -> None:
+
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        _unlink(path)
+    for companion in companions:
+        _unlink(companion)
+
+def _archive(paths: list[tuple], archive_dir: str, prefix: str) -> None:
+    """Move files into `<prefix>-<YYYY-MM>.zip` bundles by modification month."""
+
+    bundles = {}
+    for mtime, path in paths:
+        bundles.setdefault(datetime.fromtimestamp(mtime).strftime("%Y-%m"), []).append(path)
+
+    os.makedirs(archive_dir, exist_ok=True)
+    for month, members in sorted(bundles.items()):
+        with zipfile.ZipFile(os.path.join(archive_dir, f"{prefix}-{month}.zip"), "a", zipfile.ZIP_DEFLATED) as bundle:
+            existing = set(bundle.namelist())
+            for path in members:
+                name = os.path.basename(path)
+                try:
+                    if name in existing:
+                        # Already bundled by a run that stopped before deleting it
+                        if bundle.getinfo(name).file_size == os.path.getsize(path):
+                            continue
+                        stem, ext = os.path.splitext(name)
+                        name = f"{stem}-{int(os.path.getmtime(path))}{ext}"
+                    bundle.write(path, name)
+                except FileNotFoundError:
+                    # Removed since the scan
+                    continue
+                existing.add(name)
+        # Only once the bundle is safely closed
+        for path in members:
+            _unlink(path)
+
+def compact(rule: dict, now: float | None = None) -> dict:
+    """
+    Apply one policy.
+
+    Returns:
+        dict: {"path", "removed", "archived", "freed" (bytes)}
+    """
+
+    now = now or time.time()
+    entries = _entries(rule["path"], rule["suffix"])
+    protected = _protected(rule)
+    count = len(entries)
+    total = sum(size for _, size, _, _ in entries)
+    budget = rule["max_mb"] * 1024 * 1024 if rule["max_mb"] is not None else None
+
+    doomed = []
+    for mtime, size, path, companions in entries:
+        expired = rule["max_age"] is not None and now - mtime > rule["max_age"]
+        over = (rule["max_files"] is not None and count > rule["max_files"]) or (budget is not None and total > budget)
+        if not (expired or over):
+            # Oldest first, and nothing left is over a limit
+            break
+        if now - mtime < RETENTION_GRACE_SECONDS or path in protected:
+            continue
+        doomed.append((mtime, size, path, companions))
+        count -= 1
+        total -= size
+
+    stats = {"path": rule["path"], "removed": 0, "archived": 0, "freed": 0}
+    if rule["archive"] and doomed:
+        archive_dir = os.path.join(rule["path"], "archive")
+        _archive([(mtime, path) for mtime, _, path, _ in doomed], archive_dir, os.path.basename(os.path.normpath(rule["path"])))
+        for _, _, _, companions in doomed:
+            for companion in companions:
+                _unlink(companion)
+        stats["archived"] = len(doomed)
+        stats["freed"] = sum(size for _, size, _, _ in doomed)
+        return stats
+
+    for _, size, path, companions in doomed:
+        try:
+            _remove(path, companions)
+        except OSError:
+            continue
+        stats["removed"] += 1
+        stats["freed"] += size
+    return stats
+
+def compact_all(policies: list[dict] | None = None) -> list[dict]:
+
+    results = []
+    for rule in policies or default_policies():
+        try:
+            results.append(compact(rule))
+        except Exception as e:
+            # One bad directory shouldn't stop the others
+            print(f"[Retention] {rule['path']}: {type(e).__name__}: {e}")
+    return results
+
+def format_stats(stats: dict) -> str:
+
+    return f"{stats['path']}: removed {stats['removed']}, archived {stats['archived']}, freed {stats['freed'] / (1024 * 1024):.1f} MB"
+
+def start_background(interval: float = RETENTION_INTERVAL_SECONDS, policies: list[dict] | None = None) -> threading.Thread:
+    """Compact every `interval` seconds on a daemon thread. Only one per process."""
+
+    global _started
+
+    def loop():
+        while True:
+            for stats in compact_all(policies):
+                if stats["removed"] or stats["archived"]:
+                    print(f"[Retention] {format_stats(stats)}")
+            time.sleep(interval)
+
+    with _lock:
+        if _started is None:
+            _started = threading.Thread(target=loop, name="retention", daemon=True)
+            _started.start()
+        return _started
@@ -3,60 +3,639 @@ src/run_generator.py
 """
 
 
+import multiprocessing
 import os
-from src.excel_parser import load_excel, validate_columns, clean_dataframe, add_computed_fields
+import re
+import tempfile
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from src.excel_parser import iter_excel_chunks, clean_dataframe, add_computed_fields, DEFAULT_CHUNK_SIZE, REQUIRED_COLUMNS
 from src.pdf_generator import ProductSheetPDF
+from src.pdf_merge import merge_pdfs
+from src.pdf_output import PDFBuffer, save_pdf, is_path, describe, atomic_path
+from src.records import build_product_records, build_table_rows
+from src.validation import Validator, combine_reports
+from src.card_layout import CardLayout
+from src.table_layout import TableLayout
+from src import manifest as build_manifest
+from src import metrics
+from src import workbook_cache
+from src import delta
+from src.options import LAYOUTS
 
-def generate_pdf_from_excel(excel_path, output_path):
+
+_LAYOUT_ENGINES = {
+    "cards": (CardLayout, build_product_records),
+    "table": (TableLayout, build_table_rows),
+}
+
+# Render processes per PDF; sheets below SHARD_MIN_ROWS always render in one process
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "1"))
+SHARD_MIN_ROWS = int(os.getenv("SHARD_MIN_ROWS", "5000"))
+
+def generate_pdf_from_excel(excel_path, output_path=None, chunk_size=None, layout: str = "cards", workers: int | None = None, progress=None) -> dict:
     """
     Generate a PDF from a single Excel file with branding, formatting, and styling.
 
+    A workbook that was already parsed (by the web preview, watcher or an
+    earlier run) is taken from `workbook_cache`. Otherwise it is streamed
+    in chunks (see `iter_excel_chunks`), with the header validated before
+    any rows are read. The cleaned rows are cached on the way unless the
+    sheet is too large to keep.
+
+    With more than one worker, large sheets are rendered as page-range
+    shards in parallel and merged (see `_generate_sharded`).
+
     Parameters:
         excel_path (str): Path to the Excel (.xlsx) file.
-        output_path (str): Output path for the generated PDF.
-        title (str): Title for the PDF cover page.
+        output_path (str | file | None): Output path, or a writable binary stream.
+            With None the PDF is kept in memory and returned as a `PDFBuffer`
+            in the result's "output".
+        chunk_size (int): Rows per chunk (defaults to `DEFAULT_CHUNK_SIZE`).
+        layout (str): One of `LAYOUTS`.
+        workers (int): Render processes (defaults to `RENDER_WORKERS`).
+        progress (callable): Optional `progress(rows_done)`, called as rows are
+            rendered. It may raise to abort the run (e.g. on cancellation).
+
+    Returns:
+        dict: Run result (see `run_generation_job`). Errors are raised, not swallowed.
     """
 
-    try:
-        # Load & clean data
-        df = load_excel(excel_path)
-        validate_columns(df)
-        df = clean_dataframe(df)
-        df = add_computed_fields(df)
+    start = time.perf_counter()
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
 
-        # Set up PDF
+    workers = workers or RENDER_WORKERS
+    if workers > 1:
+        # Sharding needs the whole sheet up front; it comes from the cache after this
+        with metrics.span("parse"):
+            df = workbook_cache.load(excel_path)
+        if len(df) >= SHARD_MIN_ROWS:
+            return _generate_sharded(excel_path, output_path, df, layout, workers, start, progress)
+
+    # Set up PDF
+    with metrics.span("render"):
         pdf = ProductSheetPDF()
         pdf.cover_page("Product Sheet")
         pdf.add_page()
+        render = _layout_renderer(pdf, layout)
+
+    rows = 0
+    validator = Validator()
+    for df in _cleaned_chunks(excel_path, chunk_size or DEFAULT_CHUNK_SIZE, validator):
+        with metrics.span("render"):
+            render(df, stripe_start=rows % 2 == 1)
+        rows += len(df)
+        if progress:
+            progress(rows)
+
+    # Save to file, stream or buffer
+    with metrics.span("write"):
+        output, size = save_pdf(pdf, output_path, name=_pdf_name(excel_path))
+
+    metrics.count("rows", rows)
+    metrics.count("pages", pdf.page_no())
+    metrics.count("bytes", size)
+
+    result = _result(excel_path, output, rows=rows, pages=pdf.page_no(), start=start)
+    if validator.rows:
+        result["validation"] = validator.report()
+        metrics.count("invalid_rows", validator.invalid_rows)
+    return result
+
+def _pdf_name(excel_path) -> str:
+
+    return os.path.splitext(os.path.basename(excel_path))[0] + ".pdf"
+
+def _cleaned_chunks(excel_path, chunk_size, validator=None):
+    """
+    Yield cleaned DataFrame chunks, from the workbook cache when possible.
+    Streamed chunks are checked by `validator` (if given) before cleaning;
+    on a hit it takes over the report cached with the sheet.
+    """
 
-        stripe_toggle = False
-        for _, row in df.iterrows():
-            if pdf.get_y() > 260:
-                pdf.add_page()
-            pdf.add_product_block(row, stripe=stripe_toggle)
-            stripe_toggle = not stripe_toggle
+    with metrics.span("parse"):
+        cached = workbook_cache.peek(excel_path)
+    if cached is not None:
+        metrics.count("cache_hits")
+        if validator is not None and "validation" in cached.attrs:
+            validator.restore(cached.attrs["validation"])
+        for offset in range(0, len(cached), chunk_size):
+            yield cached.iloc[offset:offset + chunk_size]
+        return
 
-        # Save to file
-        pdf.output(output_path)
-        print(f"Generated: {output_path}")
+    metrics.count("cache_misses")
+    kept, kept_bytes = [], 0
+    chunks = iter_excel_chunks(excel_path, chunk_size=chunk_size)
+    while True:
+        # Reading includes the header validation on the first chunk
+        with metrics.span("parse"):
+            df = next(chunks, None)
+        if df is None:
+            break
 
-    except Exception as e:
-        print(f"Failed to process {excel_path}: {e}")
+        if validator is not None:
+            with metrics.span("validate"):
+                validator.check(df)
 
-def generate_pdfs_from_folder(input_folder: str = "data", output_folder: str = "outputs") -> None:
+        # Clean each chunk as it arrives, then format it in one pass
+        with metrics.span("clean"):
+            df = clean_dataframe(df)
+            df = add_computed_fields(df)
+
+        # Stop collecting once the sheet is too big to cache, so memory stays bounded
+        if kept is not None:
+            kept_bytes += int(df.memory_usage(deep=True).sum())
+            if kept_bytes <= workbook_cache.CACHE_MAX_ENTRY_MB * 1024 * 1024:
+                kept.append(df)
+            else:
+                kept = None
+        yield df
+
+    if kept:
+        with metrics.span("cache"):
+            df = pd.concat(kept, ignore_index=True)
+            if validator is not None:
+                df.attrs["validation"] = validator.report()
+            workbook_cache.store(excel_path, df)
+
+def _layout_renderer(pdf, layout: str):
+    """Return `render(df, stripe_start)` drawing cleaned rows onto `pdf` in `layout`."""
+
+    # One layout instance per document so the wrap cache spans every chunk
+    engine_class, build_items = _LAYOUT_ENGINES[layout]
+    engine = engine_class(pdf)
+    return lambda df, stripe_start: engine.render(build_items(df, stripe_start))
+
+def _shard_ranges(pages, shards: int) -> list[tuple]:
+    """Split a page plan into `shards` contiguous `(first page, pages)` runs of similar length."""
+
+    bounds = [round(i * len(pages) / shards) for i in range(shards + 1)]
+    return [(bounds[i], pages[bounds[i]:bounds[i + 1]]) for i in range(shards) if bounds[i] < bounds[i + 1]]
+
+def _render_shard(df, stripe_start, pages, first_page, layout, output_path) -> dict:
+    """
+    Render one page range. Runs in a worker process.
+
+    `pages` is the parent's plan for this range (indexes relative to `df`),
+    so the shard breaks pages exactly where a single-process render would.
+    """
+
+    with metrics.collect(os.path.basename(output_path)) as run:
+        engine_class, build_items = _LAYOUT_ENGINES[layout]
+        with metrics.span("render"):
+            pdf = ProductSheetPDF(first_page=first_page)
+            if first_page == 1:
+                pdf.cover_page("Product Sheet")
+            pdf.add_page()
+            engine = engine_class(pdf)
+            items = build_items(df, stripe_start)
+            engine.draw(items, engine.measure(items), pages)
+        with metrics.span("write"):
+            pdf.output(output_path)
+
+    return {"pages": pdf.page_no(), "metrics": run.snapshot()}
+
+def _generate_sharded(excel_path, output_path, df, layout, workers, start, progress=None) -> dict:
+    """
+    Render a large sheet as page-range shards in parallel, then merge them.
+
+    The parent measures and paginates every block first (cheap next to
+    drawing), so the page count and each shard's first page are known
+    before any worker starts. Shard 1 carries the cover page; the others
+    number their pages from where the previous shard ends, so header and
+    footer placement match a single-process render.
+    """
+
+    engine_class, build_items = _LAYOUT_ENGINES[layout]
+    with metrics.span("measure"):
+        pdf = ProductSheetPDF()
+        pdf.cover_page("Product Sheet")
+        pdf.add_page()
+        engine = engine_class(pdf)
+        if layout == "table":
+            # The column header sits above the first row of the page
+            engine.draw_header()
+        pages = engine.plan(engine.measure(build_items(df)), pdf.get_y())
+
+    shards = _shard_ranges(pages, min(workers, len(pages)))
+    context = multiprocessing.get_context("spawn")
+    output = PDFBuffer(name=_pdf_name(excel_path)) if output_path is None else output_path
+    with tempfile.TemporaryDirectory(dir=_scratch_dir(output_path)) as tmp_dir:
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+            futures = {}
+            for shard_index, (first, shard_pages) in enumerate(shards):
+                low, high = shard_pages[0][0], shard_pages[-1][-1] + 1
+                relative = [[index - low for index in page] for page in shard_pages]
+                part_path = os.path.join(tmp_dir, f"shard_{shard_index}.pdf")
+                # Page 1 is the cover, so the first product page is page 2
+                future = pool.submit(
+                    _render_shard, df.iloc[low:high], low % 2 == 1, relative, 1 if first == 0 else first + 2, layout, part_path
+                )
+                futures[future] = high - low
+
+            rows_done = 0
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    rows_done += futures[future]
+                    if progress:
+                        progress(rows_done)
+            except BaseException:
+                # Don't start shards nobody will merge
+                for future in futures:
+                    future.cancel()
+                raise
+            parts = [future.result() for future in futures]
+
+        run = metrics.current()
+        if run is not None:
+            for part in parts:
+                run.merge(part["metrics"])
+
+        with metrics.span("merge"):
+            page_count = merge_pdfs([os.path.join(tmp_dir, f"shard_{i}.pdf") for i in range(len(shards))], output)
+
+    metrics.count("rows", len(df))
+    metrics.count("pages", page_count)
+    metrics.count("shards", len(shards))
+    metrics.count("bytes", _output_size(output))
+
+    result = _result(excel_path, output, rows=len(df), pages=page_count, start=start)
+    result["validation"] = df.attrs.get("validation")
+    return result
+
+def _scratch_dir(output_path) -> str | None:
+    """Temp dir for partial PDFs: next to a file output, else the system default."""
+
+    return (os.path.dirname(output_path) or ".") if is_path(output_path) else None
+
+def _output_size(output) -> int:
+
+    if isinstance(output, list):
+        return sum(_output_size(item) for item in output)
+    if is_path(output):
+        return os.path.getsize(output)
+    return len(output.getvalue()) if isinstance(output, PDFBuffer) else 0
+
+def render_product_records(pdf, records) -> None:
+    """Draw product cards, measured and paginated up front (see `CardLayout`)."""
+
+    CardLayout(pdf).render(records)
+
+def _render_section(sheet_name, df, output_path, layout="cards") -> dict:
+    """Render one already cleaned sheet as a section: its own cover page, then its products."""
+
+    with metrics.span("render"):
+        pdf = ProductSheetPDF()
+        pdf.cover_page(sheet_name)
+        pdf.add_page()
+        _layout_renderer(pdf, layout)(df, stripe_start=False)
+
+    with metrics.span("write"), atomic_path(output_path) as tmp_path:
+        pdf.output(tmp_path)
+
+    return {"sheet": sheet_name, "rows": len(df), "pages": pdf.page_no(), "output": output_path}
+
+def _render_section_job(sheet_name, df, output_path, layout) -> dict:
+
+    # Runs in a worker process, so it collects its own metrics for the parent
+    with metrics.collect(sheet_name) as run:
+        section = _render_section(sheet_name, df, output_path, layout)
+    section["metrics"] = run.snapshot()
+    return section
+
+def _render_sections(sheets: dict, targets: dict, workers: int, layout: str) -> list[dict]:
+
+    if workers <= 1 or len(sheets) == 1:
+        return [_render_section(name, df, targets[name], layout) for name, df in sheets.items()]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(sheets)), mp_context=context) as pool:
+        futures = [pool.submit(_render_section_job, name, df, targets[name], layout) for name, df in sheets.items()]
+        sections = [future.result() for future in futures]
+
+    run = metrics.current()
+    for section in sections:
+        if run is not None:
+            run.merge(section["metrics"])
+        del section["metrics"]
+    return sections
+
+def _render_front_matter(output_path, sections, title="Product Sheet") -> int:
+    """Cover page plus a table of contents pointing at each section."""
+
+    def build(entries):
+        pdf = ProductSheetPDF()
+        pdf.cover_page(title)
+        pdf.table_of_contents(entries)
+        return pdf
+
+    # The contents length only depends on the number of sections
+    next_page = build([(s["sheet"], 0) for s in sections]).page_no() + 1
+    entries = []
+    for section in sections:
+        entries.append((section["sheet"], next_page))
+        next_page += section["pages"]
+
+    pdf = build(entries)
+    pdf.output(output_path)
+    return pdf.page_no()
+
+def _safe_name(name: str) -> str:
+
+    return re.sub(r"[^\w\-]+", "_", name).strip("_") or "sheet"
+
+def generate_pdf_from_workbook(excel_path, output_path, mode: str = "sections", workers: int | None = None, layout: str = "cards") -> dict:
+    """
+    Generate PDFs from every sheet of a workbook.
+
+    The workbook is read and cleaned once for all sheets (and only once
+    overall, see `workbook_cache`). Sheets are then laid out in parallel
+    worker processes. Sheets without the required
+    columns (notes, lookups) are skipped.
+
+    Parameters:
+        excel_path (str): Path to the Excel (.xlsx) file.
+        output_path (str | file | None): Output PDF ("sections"; may also be a stream, or None
+            for an in-memory `PDFBuffer`) or base name for "<name>_<sheet>.pdf" files ("separate").
+        mode (str): "sections" for one PDF with a cover per sheet and a table of contents,
+            or "separate" for one PDF per sheet.
+        workers (int): Worker processes (defaults to the CPU count).
+        layout (str): One of `LAYOUTS`.
+
+    Returns:
+        dict: Run result; "output" lists every written PDF in "separate" mode.
+    """
+
+    if mode not in ("sections", "separate"):
+        raise ValueError(f"Unknown sheet mode: {mode}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+    if mode == "separate" and not is_path(output_path):
+        raise ValueError("Separate sheet mode writes one file per sheet and needs an output path")
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+
+    with metrics.span("parse"):
+        usable = workbook_cache.load_sheets(excel_path)
+    if not usable:
+        raise ValueError(f"No sheet has the required columns: {REQUIRED_COLUMNS}")
+
+    if mode == "separate":
+        base = os.path.splitext(output_path)[0]
+        targets = {name: f"{base}_{_safe_name(name)}.pdf" for name in usable}
+        sections = _render_sections(usable, targets, workers, layout)
+        output = [section["output"] for section in sections]
+        pages = sum(section["pages"] for section in sections)
+    else:
+        output = PDFBuffer(name=_pdf_name(excel_path)) if output_path is None else output_path
+        with tempfile.TemporaryDirectory(dir=_scratch_dir(output_path)) as tmp_dir:
+            targets = {name: os.path.join(tmp_dir, f"section_{i}.pdf") for i, name in enumerate(usable)}
+            sections = _render_sections(usable, targets, workers, layout)
+
+            front_path = os.path.join(tmp_dir, "front.pdf")
+            with metrics.span("render"):
+                _render_front_matter(front_path, sections)
+            with metrics.span("merge"):
+                pages = merge_pdfs(
+                    [front_path] + [section["output"] for section in sections],
+                    output,
+                    outline=[None] + [section["sheet"] for section in sections],
+                )
+
+    rows = sum(section["rows"] for section in sections)
+    metrics.count("rows", rows)
+    metrics.count("pages", pages)
+    metrics.count("bytes", _output_size(output))
+
+    result = _result(excel_path, output, rows=rows, pages=pages, start=start)
+    reports = {name: df.attrs["validation"] for name, df in usable.items() if "validation" in df.attrs}
+    if reports:
+        result["validation"] = combine_reports(reports)
+    return result
+
+def generate_delta_from_excel(excel_path, output_path=None, full_output=None, layout: str = "cards", snapshot: str | None = None, workers: int | None = None) -> dict:
+    """
+    Render only what changed since the previous version of a workbook.
+
+    The cleaned sheet is compared with the snapshot saved by the last delta
+    build (see `src/delta.py`) and added, removed and changed products are
+    drawn into a compact "changes" PDF. Nothing is rendered when nothing
+    changed, and the first build only records a baseline. The snapshot is
+    replaced once the build has succeeded.
+
+    Parameters:
+        excel_path (str): Path to the Excel (.xlsx) file.
+        output_path (str | file | None): Where the changes PDF goes (None = in memory).
+        full_output (str | file | None): Also rebuild the full catalogue here, when
+            anything changed or the file doesn't exist yet.
+        layout (str): One of `LAYOUTS`, for the full rebuild.
+        snapshot (str): Snapshot name (defaults to the workbook's file name), so
+            versions saved under different file names can share one history.
+        workers (int): Render processes for the full rebuild.
+
+    Returns:
+        dict: Run result with "delta" (see `delta.summarize`) and "full" (the
+        full rebuild's result, or None). "skipped" means nothing was rendered.
+    """
+
+    start = time.perf_counter()
+    name = snapshot or os.path.splitext(os.path.basename(excel_path))[0]
+
+    with metrics.span("parse"):
+        df = workbook_cache.load(excel_path)
+    with metrics.span("diff"):
+        changes = delta.diff(delta.load_snapshot(name), df)
+    summary = delta.summarize(changes)
+    changed = delta.changes_count(changes)
+
+    output, pages = output_path, 0
+    if changed:
+        with metrics.span("render"):
+            output, pages = delta.render_changes(changes, output_path, name=f"{name}_changes.pdf")
+
+    full = None
+    if full_output is not None and (changed or summary["baseline"] or (is_path(full_output) and not os.path.exists(full_output))):
+        full = generate_pdf_from_excel(excel_path, full_output, layout=layout, workers=workers)
+
+    with metrics.span("diff"):
+        delta.save_snapshot(name, changes["snapshot"])
+
+    metrics.count("changed_products", changed)
+    result = _result(excel_path, output, rows=changed, pages=pages, start=start, skipped=not changed)
+    result.update(delta=summary, full=full, validation=df.attrs.get("validation"))
+    return result
+
+def run_generation_job(excel_path, output_path, sheets: str = "first", layout: str = "cards", workers: int | None = None, progress=None) -> dict:
+    """
+    Run `generate_pdf_from_excel` (or `generate_pdf_from_workbook` when
+    `sheets` is "sections"/"separate") and report the outcome instead of raising.
+
+    `progress(rows_done)` is passed through for single-sheet runs; workbook
+    runs report once, when every sheet is done.
+
+    Returns:
+        dict: {"path", "output", "rows", "pages", "seconds", "error", "skipped", "validation", "metrics"}
+        where "validation" is a `validation.Validator` report (None if the
+        rows were never checked) and "metrics" is a `RunMetrics`
+        snapshot ready for `metrics.export`.
+    """
+
+    start = time.perf_counter()
+    with metrics.collect(os.path.basename(excel_path)) as run:
+        try:
+            if sheets == "first":
+                result = generate_pdf_from_excel(excel_path, output_path, layout=layout, workers=workers, progress=progress)
+            else:
+                result = generate_pdf_from_workbook(excel_path, output_path, mode=sheets, workers=workers, layout=layout)
+                if progress:
+                    progress(result["rows"])
+        except Exception as e:
+            result = _result(excel_path, output_path, start=start, error=f"{type(e).__name__}: {e}")
+
+    result["metrics"] = run.snapshot(status="error" if result["error"] else "ok", path=excel_path)
+    return result
+
+def _result(excel_path, output_path, rows=0, pages=0, start=None, error=None, skipped=False) -> dict:
+
+    return {
+        "path": excel_path,
+        "output": output_path,
+        "rows": rows,
+        "pages": pages,
+        "seconds": round(time.perf_counter() - start, 3) if start is not None else 0.0,
+        "error": error,
+        "skipped": skipped,
+        "validation": None,
+        "metrics": None,
+    }
+
+def format_result(result: dict) -> str:
+    """One-line human readable form of a run result."""
+
+    name = os.path.basename(result["path"])
+    if result.get("delta") and not result["error"]:
+        summary = delta.format_summary(result["delta"])
+        if result["skipped"]:
+            return f"SKIP   {name} ({summary})"
+        return f"OK     {name} -> {describe(result['output'])} ({summary}, {result['pages']} pages, {result['seconds']:.2f}s)"
+    if result.get("skipped"):
+        return f"SKIP   {name} (unchanged: {describe(result['output'])})"
+    if result["error"]:
+        return f"FAILED {name}: {result['error']} ({result['seconds']:.2f}s)"
+    output = describe(result["output"])
+    invalid = (result.get("validation") or {}).get("invalid_rows")
+    return (
+        f"OK     {name} -> {output} "
+        f"({result['rows']} rows, {result['pages']} pages, {result['seconds']:.2f}s"
+        f"{f', {invalid} rows with data issues' if invalid else ''})"
+    )
+
+def _iter_job_results(jobs, workers):
+    """
+    Yield results for `jobs` in submission order.
+
+    Each job is an `(excel_path, output_path[, sheets, layout])` tuple, or an already finished
+    result dict (e.g. a workbook skipped as unchanged) that is passed through.
+
+    With more than one worker, jobs are spread over a process pool. At most
+    `2 * workers` jobs are in flight or buffered at once, so a folder of
+    hundreds of workbooks never queues all of them up front.
+    """
+
+    if workers <= 1:
+        for job in jobs:
+            yield job if isinstance(job, dict) else run_generation_job(*job)
+        return
+
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        finished = {}
+        submitted = 0
+        next_index = 0
+
+        while next_index < len(jobs):
+            while submitted < len(jobs) and len(in_flight) + len(finished) < max_in_flight:
+                job = jobs[submitted]
+                if isinstance(job, dict):
+                    finished[submitted] = job
+                else:
+                    in_flight[pool.submit(run_generation_job, *job)] = submitted
+                submitted += 1
+
+            if in_flight and next_index not in finished:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished[in_flight.pop(future)] = future.result()
+
+            # Release results in order so progress output is stable
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+def generate_pdfs_from_folder(input_folder: str = "data", output_folder: str = "outputs", workers: int = 1, progress=None, force: bool = False, layout: str = "cards") -> tuple[list[dict], list[str]]:
     """
     Generate PDFs from all Excel files in a folder.
 
+    Only workbooks whose content or template fingerprint changed since the
+    last build are regenerated (see `src/manifest.py`). PDFs whose workbook
+    has been removed are deleted.
+
     Parameters:
         input_folder (str): Directory containing Excel files.
         output_folder (str): Directory to save generated PDFs.
+        workers (int): Number of worker processes (1 = run in this process).
+        progress (callable): Optional `progress(index, total, result)` called in file order.
+        force (bool): Rebuild everything, ignoring the manifest.
+        layout (str): One of `LAYOUTS`; switching layout rebuilds every PDF.
+
+    Returns:
+        tuple: `(results, removed)`: one run result per workbook, in file
+        order, and the orphaned PDFs that were deleted.
     """
 
     os.makedirs(output_folder, exist_ok=True)
 
-    for filename in os.listdir(input_folder):
+    manifest = build_manifest.load_manifest(output_folder)
+    fingerprint = build_manifest.template_fingerprint(layout=layout)
+
+    jobs = []
+    hashes = {}
+    for filename in sorted(os.listdir(input_folder)):
         if filename.endswith(".xlsx"):
             excel_path = os.path.join(input_folder, filename)
             base_name = os.path.splitext(filename)[0]
             output_path = os.path.join(output_folder, f"{base_name}.pdf")
-            generate_pdf_from_excel(excel_path, output_path)
\ No newline at end of file
+
+            try:
+                hashes[output_path] = build_manifest.file_hash(excel_path)
+            except OSError as e:
+                jobs.append(_result(excel_path, output_path, error=f"{type(e).__name__}: {e}"))
+                continue
+
+            if not force and build_manifest.is_fresh(manifest, output_path, hashes[output_path], fingerprint):
+                entry = manifest[os.path.basename(output_path)]
+                jobs.append(_result(excel_path, output_path, rows=entry["rows"], pages=entry["pages"], skipped=True))
+            else:
+                jobs.append((excel_path, output_path, "first", layout))
+
+    removed = build_manifest.remove_orphans(manifest, output_folder)
+
+    results = []
+    for index, result in enumerate(_iter_job_results(jobs, workers), start=1):
+        results.append(result)
+        metrics.export(result["metrics"])
+        if result["error"]:
+            build_manifest.forget_build(manifest, result["output"])
+        elif not result["skipped"]:
+            build_manifest.record_build(manifest, result["path"], result["output"], hashes[result["output"]], fingerprint, result)
+        if progress:
+            progress(index, len(jobs), result)
+
+    build_manifest.save_manifest(output_folder, manifest)
+
+    return results, removed
@@ -1,14 +1,17 @@
 """
 src/scheduler.py
+
+Email jobs and their schedules. Set SCHEDULER_SUMMARY_CRON="*/3 * * * *"
+to try the monthly summary without waiting a month.
 """
 
 
 import os
-import schedule
-import time
-from datetime import datetime
-from email.message import EmailMessage
-from src.sender import send_pdf_via_email, SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, EMAIL_FROM, EMAIL_TO
+import threading
+from src.cron import CronScheduler, format_job
+from src.sender import SMTPBatchSender
+from src.sent_index import SentIndex
+from src import retention
 from dotenv import load_dotenv
 
 
@@ -17,40 +20,55 @@ load_dotenv()
 OUTPUT_FOLDER = "outputs"
 SENT_LOG_FILE = os.getenv("SENT_LOG_FILE", "outputs/sent_files.txt")
 
+# Cron expressions: minute hour day month weekday
+SEND_CRON = os.getenv("SCHEDULER_SEND_CRON", "* * * * *")
+SUMMARY_CRON = os.getenv("SCHEDULER_SUMMARY_CRON", "0 9 1 * *")
 
-def load_sent_files():
+_index = None
 
-    if not os.path.exists(SENT_LOG_FILE):
-        return set()
-    
-    with open(SENT_LOG_FILE, "r") as f:
-        return set(line.strip() for line in f)
 
-def save_sent_file(filename):
+def get_sent_index() -> SentIndex:
+    """The scheduler's sent-state index, opened (and migrated from the old log) on first use."""
 
-    with open(SENT_LOG_FILE, "a") as f:
-        f.write(filename + "\n")
+    global _index
+    if _index is None:
+        _index = SentIndex(folder=OUTPUT_FOLDER)
+        migrated = _index.import_sent_log(SENT_LOG_FILE)
+        if migrated:
+            print(f"Imported {migrated} sent PDFs from {SENT_LOG_FILE}")
+    return _index
 
 def send_unsent_pdfs():
 
-    sent_files = load_sent_files()
-    for file in os.listdir(OUTPUT_FOLDER):
-        if file.endswith(".pdf") and file not in sent_files:
-            path = os.path.join(OUTPUT_FOLDER, file)
-            send_pdf_via_email(
-                pdf_path=path,
+    index = get_sent_index()
+    index.discover()
+    unsent = index.pending()
+    if not unsent:
+        return
+
+    # One SMTP session for the whole batch
+    with SMTPBatchSender() as sender:
+        for delivery in unsent:
+            file = os.path.basename(delivery["path"])
+            index.mark_sending(delivery["hash"])
+            ok, msg = sender.send(
+                delivery["path"],
                 subject=f"[Nested{{Loop}}] New PDF: {file}",
                 body=f"Here's yor freshly generated production sheet: {file}"
             )
-            save_sent_file(file)
+            if ok:
+                index.mark_sent(delivery["hash"])
+            else:
+                index.mark_failed(delivery["hash"], msg)
+                print(f"Failed to send {file} (attempt {delivery['attempts'] + 1}): {msg}")
 
 def send_monthly_summary():
 
-    all_pdfs = [
+    all_pdfs = sorted(
         os.path.join(OUTPUT_FOLDER, f)
         for f in os.listdir(OUTPUT_FOLDER)
         if f.endswith(".pdf")
-    ]
+    )
 
     if not all_pdfs:
         print("No PDFs to include in summary.")
@@ -64,48 +82,41 @@ def send_monthly_summary():
     Best,
     Your Automation System
     """
-    msg = EmailMessage()
-    msg["Subject"] = "[Nested{Loop}] Monthly Summary – Product Sheets"
-    msg["From"] = EMAIL_FROM
-    msg["To"] = EMAIL_TO
-    msg.set_content(msg_body)
-
-    for pdf in all_pdfs:
-        send_pdf_via_email(
-            pdf_path=pdf,
-            subject="[Nested{Loop}] Monthly Summary - Project Sheet",
-            body=f"This is your monthly archive of : {os.path.basename(pdf)}"
-        )
 
-    try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as smtp:
-            smtp.starttls()
-            smtp.login(SMTP_USER, SMTP_PASS)
-            smtp.send_message(msg)
-            print(f"Monthly summary email sent with {len(all_pdfs)} attachments.")
-    except Exception as e:
-        print(f"Failed to send summary: {e}")
-
-def start_scheduler(run_for_minutes=4):
+    # A single email carrying every PDF
+    with SMTPBatchSender() as sender:
+        ok, msg = sender.send(
+            all_pdfs,
+            subject="[Nested{Loop}] Monthly Summary – Product Sheets",
+            body=msg_body,
+        )
 
-    print("Scheduler started!")
-    start_time = time.time()
+    if ok:
+        print(f"Monthly summary email sent with {len(all_pdfs)} attachments.")
+    else:
+        print(f"Failed to send summary: {msg}")
 
-    # Every 2 mins - simlated instant-on-change delivery
-    schedule.every(1).minutes.do(send_unsent_pdfs)
+def start_scheduler(run_for_minutes: float | None = None):
+    """Run the email jobs until Ctrl+C, or for `run_for_minutes`."""
 
-    # For real monthly schedule use:
-    # schedule.every().month.at("09:00").do(send_monthly_summary)
+    scheduler = CronScheduler()
+    # Near-instant delivery of new PDFs
+    scheduler.add_job("send_unsent_pdfs", send_unsent_pdfs, SEND_CRON)
+    # 09:00 on the 1st; a summary missed while the scheduler was down is sent on start-up
+    scheduler.add_job("monthly_summary", send_monthly_summary, SUMMARY_CRON)
+    scheduler.start()
 
-    # Simulate monthly summary every 5 minutes (for testing)
-    schedule.every(3).minutes.do(send_monthly_summary)
+    # Keeps outputs/ (which every send scans) small
+    retention.start_background()
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    print("Scheduler started!")
+    for job in scheduler.jobs():
+        print(f"  {format_job(job)}")
 
-        # Auto-exit after time limit
-        elapsed = (time.time() - start_time) / 60
-        if elapsed > run_for_minutes:
-            print("Scheduler finished - time limit reached.")
-            break
\ No newline at end of file
+    try:
+        # The scheduler sleeps on its own thread until the next deadline
+        threading.Event().wait(run_for_minutes * 60 if run_for_minutes else None)
+        print("Scheduler finished - time limit reached.")
+    except KeyboardInterrupt:
+        print("Scheduler stopped.")
+    scheduler.stop()
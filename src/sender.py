@@ -7,6 +7,8 @@ import smtplib, ssl, mimetypes
 import os
 from email.message import EmailMessage
 from dotenv import load_dotenv
+from src import metrics
+from src.pdf_output import is_path, pdf_name, pdf_bytes
 
 
 load_dotenv()
@@ -36,52 +38,153 @@ def _get_env(name: str, fallback: str | None = None) -> str | None:
     
     return fallback
 
-def send_pdf_via_email(pdf_path, to_email: str | None = None, subject="Your PDF from Nested{Loop}", body: str | None = None):
+def _smtp_settings() -> dict:
 
-    if DEMO_MODE:
-        msg = f"[Demo] Email 'sent' to {to_email or 'demo@nestedloop.ai'} with attachment: {os.path.basename(pdf_path)}"
-        print(msg)
-        return True, msg
-    
     # Read credentials (supports either SMTP_* or MAILTRAP_* env vars)
-    smtp_host = _get_env("SMTP_HOST")
-    smtp_port = int(_get_env("SMTP_PORT", "587") or "587")
     smtp_user = _get_env("SMTP_USER")
-    smtp_pass = _get_env("SMTP_PASS")
-    from_email = _get_env("FROM_EMAIL") or smtp_user
-    to_email = to_email or _get_env("TO_EMAIL") or smtp_user
+    return {
+        "host": _get_env("SMTP_HOST"),
+        "port": int(_get_env("SMTP_PORT", "587") or "587"),
+        "user": smtp_user,
+        "password": _get_env("SMTP_PASS"),
+        "from_email": _get_env("FROM_EMAIL") or smtp_user,
+        "to_email": _get_env("TO_EMAIL") or smtp_user,
+    }
 
-    if not all([smtp_host, smtp_user, smtp_pass, from_email, to_email]):
-        return False, "Missing SMTP credentials/env vars (SMTP_* or MAILTRAP_*)."
+def _connect(settings: dict):
 
-    if not os.path.exists(pdf_path):
-        return False, f"Attachment not found: {pdf_path}"
-    
-    msg = EmailMessage()
-    msg["From"] = from_email
-    msg["To"] = to_email
-    msg["Subject"] = subject or "Product Sheet"
-    msg.set_content(body or "Attached: generated product sheet.")
+    if settings["port"] == 465:
+        context = ssl.create_default_context()
+        server = smtplib.SMTP_SSL(settings["host"], settings["port"], context=context, timeout=10)
+    else:
+        server = smtplib.SMTP(settings["host"], settings["port"], timeout=10)
+        server.ehlo()
+        server.starttls(context=ssl.create_default_context())
+        server.ehlo()
+    server.login(settings["user"], settings["password"])
+    return server
+
+def _is_permanent(error) -> bool:
+    """5xx replies (bad credentials, refused sender or recipients, rejected data) won't change on a retry."""
+
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
 
-    ctype, _ = mimetypes.guess_type(pdf_path)
+def _failure(error) -> tuple:
+
+    # notify retries "Email failed" but not "Email rejected"
+    return False, f"Email {'rejected' if _is_permanent(error) else 'failed'}: {error}"
+
+def _attach(msg: EmailMessage, pdf) -> None:
+
+    # `pdf` is a path or an in-memory `PDFBuffer`; buffers are attached without touching disk
+    name = pdf_name(pdf)
+    ctype, _ = mimetypes.guess_type(name)
     ctype = ctype or "application/pdf"
+    msg.add_attachment(pdf_bytes(pdf), maintype=ctype.split("/")[0], subtype=ctype.split("/")[1], filename=name)
+
+
+class SMTPBatchSender:
+    """
+    Send many emails over one authenticated SMTP session.
+
+        with SMTPBatchSender() as sender:
+            for path in paths:
+                sender.send(path, subject=...)
+
+    The connection is opened on the first send and reused until `close()`.
+    Before each later send it is checked with NOOP and reopened if the
+    server dropped it (idle timeout, provider limits). A failed send is
+    never retried here, since it may already have been delivered.
+    """
+
+    def __init__(self):
+
+        self.settings = _smtp_settings()
+        self._server = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc):
 
-    with open(pdf_path, "rb") as f:
-        msg.add_attachment(f.read(), maintype=ctype.split("/")[0], subtype=ctype.split("/")[1], filename=os.path.basename(pdf_path))
-
-    try:
-        if smtp_port == 465:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(smtp_host, smtp_port, context=context, timeout=10) as server:
-                server.login(smtp_user, smtp_pass)
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(smtp_host, smtp_port, timeout=10) as server:
-                server.ehlo()
-                server.starttls(context=ssl.create_default_context())
-                server.ehlo()
-                server.login(smtp_user, smtp_pass)
-                server.send_message(msg)
+        self.close()
+
+    def close(self) -> None:
+
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def _connection(self):
+        """The open session, checked with NOOP first; a dropped one is replaced."""
+
+        if self._server is not None:
+            try:
+                code, _ = self._server.noop()
+                if code == 250:
+                    return self._server
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                pass
+            # Idle timeout or provider limits closed it
+            self.close()
+        self._server = _connect(self.settings)
+        return self._server
+
+    def send(self, pdf_paths, to_email: str | None = None, subject="Your PDF from Nested{Loop}", body: str | None = None):
+        """
+        Send one email with one or more PDF attachments (paths or `PDFBuffer`s).
+        Returns `(ok, message)`.
+        """
+
+        pdf_paths = list(pdf_paths) if isinstance(pdf_paths, (list, tuple)) else [pdf_paths]
+        names = ", ".join(pdf_name(p) for p in pdf_paths)
+
+        if DEMO_MODE:
+            msg = f"[Demo] Email 'sent' to {to_email or 'demo@nestedloop.ai'} with attachment: {names}"
+            print(msg)
+            return True, msg
+
+        settings = self.settings
+        to_email = to_email or settings["to_email"]
+        if not all([settings["host"], settings["user"], settings["password"], settings["from_email"], to_email]):
+            return False, "Missing SMTP credentials/env vars (SMTP_* or MAILTRAP_*)."
+
+        for pdf_path in pdf_paths:
+            if is_path(pdf_path) and not os.path.exists(pdf_path):
+                return False, f"Attachment not found: {pdf_path}"
+
+        msg = EmailMessage()
+        msg["From"] = settings["from_email"]
+        msg["To"] = to_email
+        msg["Subject"] = subject or "Product Sheet"
+        msg.set_content(body or "Attached: generated product sheet.")
+        for pdf_path in pdf_paths:
+            _attach(msg, pdf_path)
+
+        try:
+            server = self._connection()
+        except Exception as e:
+            self.close()
+            return _failure(e)
+
+        # Never resent: after DATA the server may already have accepted it
+        try:
+            server.send_message(msg)
+        except Exception as e:
+            self.close()
+            return _failure(e)
         return True, "Email sent."
-    except Exception as e:
-        return False, f"Email failed: {e}"
+
+
+@metrics.timed("notify.email")
+def send_pdf_via_email(pdf_path, to_email: str | None = None, subject="Your PDF from Nested{Loop}", body: str | None = None):
+    """Send a single email; `pdf_path` may be a path, a `PDFBuffer`, or a list of either."""
+
+    with SMTPBatchSender() as sender:
+        return sender.send(pdf_path, to_email=to_email, subject=subject, body=body)
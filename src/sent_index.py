@@ -0,0 +1,251 @@
+"""
+src/sent_index.py
+
+SQLite index of which PDFs the scheduler has emailed.
+
+Send state is keyed by content hash, not file name: a renamed PDF is not
+sent twice, and a regenerated one (same name, new content) is sent again.
+Discovery is incremental. The folder is only listed when its mtime has
+changed, which every new, renamed or deleted PDF causes (the generators
+write through `pdf_output.atomic_path`, so a rewrite is a rename too),
+plus a full rescan every `SENT_FULL_RESCAN_SECONDS` for files edited in
+place by other tools. Files are only hashed when new or when their size
+or mtime changed since they were last seen.
+
+Every state change is its own transaction. A send is recorded as
+"sending" (with its attempt count) before the SMTP call and as
+"sent"/"failed" after it, so a crash mid-send leaves a row that is
+retried on the next run rather than silently lost. Delivery is
+therefore at-least-once.
+"""
+
+
+import os
+import sqlite3
+import time
+from src.manifest import file_hash
+
+
+OUTPUT_FOLDER = "outputs"
+SENT_DB_FILE = os.getenv("SENT_DB_FILE", os.path.join(OUTPUT_FOLDER, ".sent_index.sqlite3"))
+MAX_SEND_ATTEMPTS = int(os.getenv("MAX_SEND_ATTEMPTS", "5"))
+SENT_FULL_RESCAN_SECONDS = float(os.getenv("SENT_FULL_RESCAN_SECONDS", "3600"))
+
+# A folder mtime this recent may be followed by changes in the same timestamp tick
+_MTIME_SETTLE_NS = 2 * 10**9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    first_seen REAL NOT NULL,
+    last_attempt REAL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS deliveries_status ON deliveries (status);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SentIndex:
+    """
+    Sent-state index for one output folder.
+
+        index = SentIndex()
+        index.discover()
+        for delivery in index.pending():
+            index.mark_sending(delivery["hash"])
+            ...
+            index.mark_sent(delivery["hash"])
+    """
+
+    def __init__(self, db_path: str = SENT_DB_FILE, folder: str = OUTPUT_FOLDER):
+
+        self.folder = folder
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # The scheduler calls it from pool threads, one send job at a time
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+            # Sends interrupted by a crash go back in the queue
+            self._db.execute("UPDATE deliveries SET status = 'pending' WHERE status = 'sending'")
+
+        # Known files, kept in memory so a tick never has to read the whole table
+        self._known = {
+            row["path"]: (row["size"], row["mtime_ns"])
+            for row in self._db.execute("SELECT path, size, mtime_ns FROM files")
+        }
+        # Folder mtime at the last listing; None forces the first one
+        self._folder_mtime = None
+        self._next_full_scan = 0.0
+
+    def _meta(self, key: str, default: str) -> str:
+
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def discover(self) -> int:
+        """Index new and changed PDFs in the folder. Returns how many were (re)hashed."""
+
+        try:
+            folder_mtime = os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        now = time.time()
+        if (folder_mtime == self._folder_mtime and now < self._next_full_scan
+                and time.time_ns() - folder_mtime > _MTIME_SETTLE_NS):
+            return 0
+        # Taken before listing, so a change made during the scan is seen next time
+        self._folder_mtime = folder_mtime
+        self._next_full_scan = now + SENT_FULL_RESCAN_SECONDS
+
+        try:
+            entries = [entry for entry in os.scandir(self.folder) if entry.name.endswith(".pdf") and entry.is_file()]
+        except FileNotFoundError:
+            return 0
+
+        changed = 0
+        for entry in entries:
+            stat = entry.stat()
+            known = self._known.get(entry.path)
+            # A file moved into place can keep an older mtime, so any stat change counts
+            if known == (stat.st_size, stat.st_mtime_ns):
+                continue
+
+            try:
+                digest = file_hash(entry.path)
+            except OSError:
+                # Removed or still being written; picked up next time
+                continue
+
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, hash = excluded.hash",
+                    (entry.path, stat.st_size, stat.st_mtime_ns, digest),
+                )
+                self._db.execute(
+                    "INSERT OR IGNORE INTO deliveries (hash, name, first_seen) VALUES (?, ?, ?)",
+                    (digest, entry.name, now),
+                )
+            self._known[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            changed += 1
+
+        for path in self._known.keys() - {entry.path for entry in entries}:
+            self.forget(path)
+        return changed
+
+    def pending(self, limit: int | None = None) -> list[dict]:
+        """Unsent PDFs (oldest first) that still exist, with `hash`, `path`, `name` and `attempts`."""
+
+        rows = self._db.execute(
+            "SELECT d.hash, d.name, d.attempts, MIN(f.path) AS path FROM deliveries d "
+            "JOIN files f ON f.hash = d.hash "
+            "WHERE d.status IN ('pending', 'failed') AND d.attempts < ? "
+            "GROUP BY d.hash ORDER BY d.first_seen, d.name LIMIT ?",
+            (MAX_SEND_ATTEMPTS, -1 if limit is None else limit),
+        ).fetchall()
+
+        pending = []
+        for row in rows:
+            try:
+                stat = os.stat(row["path"])
+            except FileNotFoundError:
+                self.forget(row["path"])
+                continue
+            # Changed since it was hashed (e.g. still being written): wait for the next discover
+            if self._known.get(row["path"]) == (stat.st_size, stat.st_mtime_ns):
+                pending.append(dict(row))
+            else:
+                # Edited in place, which the folder mtime doesn't show
+                self._folder_mtime = None
+        return pending
+
+    def mark_sending(self, digest: str) -> None:
+
+        with self._db:
+            self._db.execute(
+                "UPDATE deliveries SET status = 'sending', attempts = attempts + 1, last_attempt = ? WHERE hash = ?",
+                (time.time(), digest),
+            )
+
+    def mark_sent(self, digest: str) -> None:
+
+        with self._db:
+            self._db.execute(
+                "UPDATE deliveries SET status = 'sent', sent_at = ?, last_error = NULL WHERE hash = ?",
+                (time.time(), digest),
+            )
+
+    def mark_failed(self, digest: str, error: str) -> None:
+
+        with self._db:
+            self._db.execute("UPDATE deliveries SET status = 'failed', last_error = ? WHERE hash = ?", (error, digest))
+
+    def forget(self, path: str) -> None:
+        """Drop a file that no longer exists (its delivery history is kept)."""
+
+        with self._db:
+            self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+        self._known.pop(path, None)
+
+    def import_sent_log(self, log_path: str) -> int:
+        """
+        One-off migration from the old `sent_files.txt` name log: PDFs listed
+        there are marked as sent. Does nothing after the first successful
+        import. Returns how many were marked.
+        """
+
+        if self._meta("sent_log_imported", "") or not os.path.exists(log_path):
+            return 0
+        with open(log_path, "r") as f:
+            names = {line.strip() for line in f if line.strip()}
+
+        self.discover()
+        marked = 0
+        with self._db:
+            for path, in self._db.execute("SELECT path FROM files").fetchall():
+                if os.path.basename(path) in names:
+                    marked += self._db.execute(
+                        "UPDATE deliveries SET status = 'sent', sent_at = ? WHERE status != 'sent' "
+                        "AND hash = (SELECT hash FROM files WHERE path = ?)",
+                        (time.time(), path),
+                    ).rowcount
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('sent_log_imported', ?)", (log_path,))
+        return marked
+
+    def close(self) -> None:
+
+        self._db.close()
+
+
+def unsent_paths(db_path: str = SENT_DB_FILE) -> set:
+    """
+    Paths of PDFs not yet sent, read without opening a `SentIndex` (which
+    would re-queue in-flight sends). Empty if there is no index yet.
+    """
+
+    if not os.path.exists(db_path):
+        return set()
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = db.execute(
+            "SELECT f.path FROM files f JOIN deliveries d ON d.hash = f.hash WHERE d.status != 'sent'"
+        ).fetchall()
+    finally:
+        db.close()
+    return {path for path, in rows}
@@ -0,0 +1,134 @@
+"""
+src/table_layout.py
+
+Dense table layout for price lists.
+
+Instead of one boxed card per product, products are drawn as rows of a
+multi-column table with the column header repeated on every page. Rows
+are measured and paginated before drawing (see `src/pagination.py`), and
+lines are placed with `text`, so no `cell`/`multi_cell` layout runs per
+product.
+"""
+
+
+from src.pdf_generator import BRAND_TEAL, ZEBRA_GRAY
+from src.pagination import LineWrapper, paginate
+
+
+# (title, width in mm, align, wraps)
+TABLE_COLUMNS = [
+    ("SKU", 24, "L", True),
+    ("Product", 46, "L", True),
+    ("Description", 70, "L", True),
+    ("Price", 17, "R", False),
+    ("inc. VAT", 17, "R", False),
+    ("Stock", 16, "R", False),
+]
+
+FONT_SIZE = 8
+LINE_HEIGHT = 4
+HEADER_HEIGHT = 6
+LEFT = 10
+
+
+class TableLayout:
+    """
+    Lays out `build_table_rows` output on a `ProductSheetPDF`.
+
+        layout = TableLayout(pdf)
+        layout.render(rows)
+
+    One instance per document, so the wrap cache spans every chunk and a
+    repeated description (or product name) is measured once.
+    """
+
+    def __init__(self, pdf, columns=None):
+
+        self.pdf = pdf
+        self.columns = columns or TABLE_COLUMNS
+        self.wrapper = LineWrapper(pdf)
+        self._header_drawn_on = None
+
+    def measure(self, rows) -> list[tuple]:
+        """`(wrapped lines per cell, row height)` for every row."""
+
+        self.pdf.set_font("Helvetica", "", FONT_SIZE)
+        padding = 2 * self.pdf.c_margin
+        wrap = self.wrapper.wrap
+
+        blocks = []
+        for cells, _ in rows:
+            wrapped = [
+                wrap(text, width - padding) if wraps else [text]
+                for text, (_, width, _, wraps) in zip(cells, self.columns)
+            ]
+            blocks.append((wrapped, max(len(lines) for lines in wrapped) * LINE_HEIGHT))
+        return blocks
+
+    def plan(self, blocks, y: float) -> list[list[int]]:
+        """Pages of row indexes, starting from `y` on the current page."""
+
+        pdf = self.pdf
+        heights = [height for _, height in blocks]
+        return paginate(heights, y, pdf.content_top + HEADER_HEIGHT, pdf.page_break_trigger)
+
+    def draw_header(self) -> None:
+
+        pdf = self.pdf
+        pdf.set_font("Helvetica", "B", FONT_SIZE)
+        pdf.set_fill_color(*BRAND_TEAL)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_x(LEFT)
+        for title, width, align, _ in self.columns:
+            pdf.cell(width, HEADER_HEIGHT, title, align=align, fill=True)
+        pdf.ln(HEADER_HEIGHT)
+
+        pdf.set_font("Helvetica", "", FONT_SIZE)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_fill_color(*ZEBRA_GRAY)
+        self._header_drawn_on = pdf.page_no()
+
+    def draw_row(self, wrapped, height, stripe) -> None:
+
+        pdf = self.pdf
+        y = pdf.get_y()
+        if stripe:
+            pdf.rect(LEFT, y, sum(column[1] for column in self.columns), height, style="F")
+
+        # `text` places a string at a baseline directly, skipping the
+        # per-call layout work `cell` does; alignment is done from the
+        # cached string widths instead
+        baseline = y + (LINE_HEIGHT + pdf.font_size) / 2 - pdf.font_size * 0.2
+        x = LEFT
+        for lines, (_, width, align, _) in zip(wrapped, self.columns):
+            for i, line in enumerate(lines):
+                if align == "R":
+                    line_x = x + width - pdf.c_margin - self.wrapper.width(line)
+                else:
+                    line_x = x + pdf.c_margin
+                pdf.text(line_x, baseline + i * LINE_HEIGHT, line)
+            x += width
+        pdf.set_xy(LEFT, y + height)
+
+    def draw(self, rows, blocks, pages) -> None:
+        """Draw a page plan from `plan`; every list after the first starts a new page."""
+
+        pdf = self.pdf
+        for page_index, indexes in enumerate(pages):
+            if page_index:
+                pdf.add_page()
+            if self._header_drawn_on != pdf.page_no():
+                self.draw_header()
+            for index in indexes:
+                wrapped, height = blocks[index]
+                self.draw_row(wrapped, height, rows[index][1])
+
+    def render(self, rows) -> None:
+        """Draw `(cells, stripe)` rows; rows never straddle a page break."""
+
+        pdf = self.pdf
+        if self._header_drawn_on != pdf.page_no():
+            self.draw_header()
+
+        blocks = self.measure(rows)
+        self.draw(rows, blocks, self.plan(blocks, pdf.get_y()))
@@ -0,0 +1,175 @@
+"""
+src/validation.py
+
+Schema-driven data-quality checks for product sheets.
+
+Each column is checked in one vectorized pass against its entry in
+`SCHEMA` (type, nulls, range, uniqueness). Nothing is printed or
+dropped: the result is a report of which rows failed which rule, which
+the caller can show, log or act on.
+
+Checks run on raw rows (before `clean_dataframe`, which coerces bad
+values away). Large sheets can be checked chunk by chunk:
+
+    validator = Validator()
+    for chunk in iter_excel_chunks(path):
+        validator.check(chunk)
+    report = validator.report()
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+# dtype: "str", "float" or "int"; required: no nulls/blanks; min: lowest allowed value;
+# unique: no repeats across the whole sheet
+SCHEMA = {
+    "SKU": {"dtype": "str", "required": True, "unique": True},
+    "Name": {"dtype": "str", "required": True},
+    "Description": {"dtype": "str"},
+    "Price": {"dtype": "float", "required": True, "min": 0},
+    "Stock": {"dtype": "int", "min": 0},
+}
+
+# Row indices listed per issue in a report; the count is always exact
+MAX_ROWS_PER_ISSUE = 20
+
+
+class Validator:
+    """
+    Accumulates issues over one sheet, fed in one or more chunks.
+
+    Row indices in the report are 0-based positions among the sheet's
+    data rows, counted across chunks.
+    """
+
+    def __init__(self, schema: dict = SCHEMA):
+
+        self.schema = schema
+        self.rows = 0
+        self.invalid_rows = 0
+        self._issues = {}
+        self._seen = {column: [] for column, rules in schema.items() if rules.get("unique")}
+
+    def check(self, df: pd.DataFrame) -> None:
+        """Check the next chunk of raw rows."""
+
+        offset, self.rows = self.rows, self.rows + len(df)
+        columns = {str(c).strip(): c for c in df.columns}
+        invalid = np.zeros(len(df), dtype=bool)
+        for column, rules in self.schema.items():
+            if column not in columns:
+                self._add(column, "missing column", [])
+                continue
+            for reason, mask in _column_issues(df[columns[column]], rules, self._seen.get(column)):
+                mask = mask.to_numpy(dtype=bool, na_value=False)
+                positions = mask.nonzero()[0]
+                if len(positions):
+                    self._add(column, reason, positions + offset)
+                    invalid |= mask
+        self.invalid_rows += int(invalid.sum())
+
+    def _add(self, column, reason, rows) -> None:
+
+        issue = self._issues.setdefault((column, reason), {"column": column, "reason": reason, "count": 0, "rows": []})
+        issue["count"] += len(rows)
+        room = MAX_ROWS_PER_ISSUE - len(issue["rows"])
+        if room > 0:
+            issue["rows"].extend(int(row) for row in rows[:room])
+
+    def restore(self, report: dict) -> None:
+        """Take over a report made earlier (e.g. one cached with the cleaned sheet)."""
+
+        self.rows = report["rows"]
+        self.invalid_rows = report["invalid_rows"]
+        self._issues = {(issue["column"], issue["reason"]): dict(issue, rows=list(issue["rows"])) for issue in report["issues"]}
+
+    def report(self) -> dict:
+        """
+        Returns:
+            dict: {"rows": rows checked, "invalid_rows": rows with at least one issue,
+                   "issues": [{"column", "reason", "count", "rows"}]}
+            where "rows" per issue lists at most `MAX_ROWS_PER_ISSUE` indices.
+        """
+
+        return {"rows": self.rows, "invalid_rows": self.invalid_rows, "issues": list(self._issues.values())}
+
+
+def _column_issues(series: pd.Series, rules: dict, seen: list | None):
+    """Yield `(reason, boolean mask)` for each rule `series` is checked against."""
+
+    dtype = rules.get("dtype", "str")
+    missing = series.isna()
+
+    if dtype == "str":
+        text = series.astype("string").str.strip()
+        blank = missing | (text == "")
+        if rules.get("required"):
+            yield "empty", blank
+        if seen is not None:
+            yield "duplicate", _duplicates(text.where(~blank), seen)
+        return
+
+    values = pd.to_numeric(series, errors="coerce")
+    if rules.get("required"):
+        yield "empty", missing
+    yield "not a number", values.isna() & ~missing
+    if dtype == "int":
+        yield "not a whole number", values.notna() & (values % 1 != 0)
+    if "min" in rules:
+        yield f"below {rules['min']}", values < rules["min"]
+    if "max" in rules:
+        yield f"above {rules['max']}", values > rules["max"]
+    if seen is not None:
+        yield "duplicate", _duplicates(values, seen)
+
+def _duplicates(values: pd.Series, seen: list) -> pd.Series:
+    """
+    Repeats within `values` or of anything in earlier chunks. Nulls never count.
+
+    Values are compared by 64-bit hash, and `seen` (updated in place) holds
+    one sorted hash array per earlier chunk, so each chunk costs a few
+    binary searches rather than a rescan of everything before it.
+    """
+
+    present = values.notna().to_numpy()
+    hashes = pd.util.hash_pandas_object(values[present], index=False).to_numpy()
+    repeated = pd.Series(hashes).duplicated(keep="first").to_numpy(copy=True)
+    for earlier in seen:
+        positions = np.searchsorted(earlier, hashes).clip(max=len(earlier) - 1)
+        repeated |= earlier[positions] == hashes
+    new = np.sort(hashes[~repeated])
+    if len(new):
+        seen.append(new)
+
+    mask = np.zeros(len(values), dtype=bool)
+    mask[present] = repeated
+    return pd.Series(mask, index=values.index)
+
+def validate(df: pd.DataFrame, schema: dict = SCHEMA) -> dict:
+    """Check a whole sheet in one go; see `Validator.report` for the result."""
+
+    validator = Validator(schema)
+    validator.check(df)
+    return validator.report()
+
+def combine_reports(reports: dict) -> dict:
+    """One report for several sheets (`{sheet name: report}`); each issue gains a "sheet"."""
+
+    return {
+        "rows": sum(report["rows"] for report in reports.values()),
+        "invalid_rows": sum(report["invalid_rows"] for report in reports.values()),
+        "issues": [dict(issue, sheet=name) for name, report in reports.items() for issue in report["issues"]],
+    }
+
+def format_report(report: dict) -> list[str]:
+    """Human readable lines, one per issue."""
+
+    lines = []
+    for issue in report["issues"]:
+        rows = ", ".join(str(row) for row in issue["rows"])
+        more = f" (+{issue['count'] - len(issue['rows'])} more)" if issue["count"] > len(issue["rows"]) else ""
+        where = f"{issue['sheet']} / " if issue.get("sheet") else ""
+        lines.append(f"{where}{issue['column']}: {issue['reason']} x{issue['count']}" + (f" - rows {rows}{more}" if rows else ""))
+    return lines
@@ -1,47 +1,238 @@
 """
 src/watcher.py
+
+Watches a folder and regenerates PDFs for new or changed workbooks.
+
+Watchdog callbacks only enqueue paths. A `GenerationQueue` debounces the
+burst of events a single Excel save produces, waits until the file size
+stops changing, coalesces duplicates and hands stable files to a process
+pool, so the observer thread never blocks on PDF generation.
 """
 
 
 import time
 import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from src.run_generators import generate_pdf_from_excel
+from src.run_generators import run_generation_job, format_result
+from src import manifest as build_manifest
+from src import metrics
+from src import retention
 
 
 WATCH_FOLDER = "data"
 OUTPUT_FOLDER = "outputs"
 
+# Quiet period after the last event before a file is considered saved
+DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "1.0"))
+WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
 
-class ExcelEventHandler(FileSystemEventHandler):
 
-    def on_modified(self, event):
+def _is_workbook(path: str) -> bool:
+
+    # Excel keeps "~$name.xlsx" lock files next to open workbooks
+    name = os.path.basename(path)
+    return name.endswith(".xlsx") and not name.startswith("~$")
+
+def _signature(path: str):
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class GenerationQueue:
+    """
+    Debounced, coalescing queue of workbooks to regenerate.
+
+    A path is submitted once no event has arrived for `debounce` seconds and
+    its size/mtime matched at the last two checks. A path is never built
+    twice at once; changes that land mid-build trigger one more build.
+    """
+
+    def __init__(self, output_folder: str = OUTPUT_FOLDER, workers: int = WATCH_WORKERS, debounce: float = DEBOUNCE_SECONDS):
+
+        self.output_folder = output_folder
+        self.workers = max(1, workers)
+        self.debounce = debounce
+
+        self._pending = {}      # path -> (deadline, signature)
+        self._running = set()
+        self._cond = threading.Condition()
+        self._manifest_lock = threading.Lock()
+        self._stopped = False
+        self._executor = None
+        self._thread = None
+
+    def start(self) -> None:
+
+        # Spawn, not fork: the observer and queue threads hold locks
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._thread = threading.Thread(target=self._loop, name="watch-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def push(self, path: str) -> None:
+        """Record an event for `path`; repeated events just push the deadline back."""
+
+        with self._cond:
+            self._pending[path] = (time.monotonic() + self.debounce, _signature(path))
+            self._cond.notify()
+
+    def _loop(self) -> None:
+
+        while True:
+            ready = []
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                next_deadline = None
+
+                for path, (deadline, signature) in list(self._pending.items()):
+                    if deadline > now or path in self._running:
+                        if path not in self._running:
+                            next_deadline = min(next_deadline or deadline, deadline)
+                        continue
+                    if len(self._running) >= self.workers * 2:
+                        break
+
+                    current = _signature(path)
+                    if current is None:
+                        # Deleted before it settled
+                        del self._pending[path]
+                    elif current != signature:
+                        # Still being written; check again after another quiet period
+                        self._pending[path] = (now + self.debounce, current)
+                        next_deadline = min(next_deadline or now + self.debounce, now + self.debounce)
+                    else:
+                        del self._pending[path]
+                        self._running.add(path)
+                        ready.append(path)
+
+                if not ready:
+                    timeout = None if next_deadline is None else max(0.0, next_deadline - time.monotonic())
+                    self._cond.wait(timeout)
+                    continue
+
+            # Hashing and the manifest check run off the lock, so push() (and the observer) never waits on them
+            for path in ready:
+                self._submit(path)
+
+    def _submit(self, excel_path: str) -> None:
+
+        filename = os.path.basename(excel_path)
+        output_path = os.path.join(self.output_folder, filename.replace(".xlsx", ".pdf"))
+
+        # Skip rebuilds when the workbook and template are unchanged
+        fingerprint = build_manifest.template_fingerprint()
+        try:
+            source_hash = build_manifest.file_hash(excel_path)
+        except OSError:
+            self._finish(excel_path)
+            return
+        with self._manifest_lock:
+            manifest = build_manifest.load_manifest(self.output_folder)
+        if build_manifest.is_fresh(manifest, output_path, source_hash, fingerprint):
+            self._finish(excel_path)
+            return
+
+        # Notification
+        print("\a") # BEEP!
+        print(f"Detected change in: {filename}")
+        future = self._executor.submit(run_generation_job, excel_path, output_path)
+        future.add_done_callback(lambda f: self._on_done(excel_path, output_path, source_hash, fingerprint, f))
 
-        if event.is_directory:
+    def _on_done(self, excel_path, output_path, source_hash, fingerprint, future) -> None:
+
+        try:
+            result = future.result()
+        except Exception as e:
+            # The worker process itself died
+            print(f"FAILED {os.path.basename(excel_path)}: {e}")
+            self._finish(excel_path)
             return
-        
-        if event.src_path.endswith(".xlsx"):
-            filename = os.path.basename(event.src_path)
-            output_name = filename.replace(".xlsx", ".pdf")
-            output_path = os.path.join(OUTPUT_FOLDER, output_name)
 
-            # Notification
-            print("\a") # BEEP!
-            print(f"Detected change in: {filename}")
-            generate_pdf_from_excel(event.src_path, output_path)
+        metrics.export(result["metrics"])
+        print(format_result(result))
+
+        with self._manifest_lock:
+            manifest = build_manifest.load_manifest(self.output_folder)
+            if result["error"]:
+                build_manifest.forget_build(manifest, output_path)
+            else:
+                build_manifest.record_build(manifest, excel_path, output_path, source_hash, fingerprint, result)
+            build_manifest.save_manifest(self.output_folder, manifest)
+
+        self._finish(excel_path)
 
-    def on_create(self, event):
+    def _finish(self, path: str) -> None:
+
+        with self._cond:
+            self._running.discard(path)
+            self._cond.notify()
+
+    def remove_orphans(self) -> None:
+
+        with self._manifest_lock:
+            manifest = build_manifest.load_manifest(self.output_folder)
+            for removed in build_manifest.remove_orphans(manifest, self.output_folder):
+                print(f"Removed orphaned PDF: {removed}")
+            build_manifest.save_manifest(self.output_folder, manifest)
+
+
+class ExcelEventHandler(FileSystemEventHandler):
+
+    def __init__(self, queue: GenerationQueue):
+
+        super().__init__()
+        self.queue = queue
+
+    def on_modified(self, event):
+
+        if not event.is_directory and _is_workbook(event.src_path):
+            self.queue.push(event.src_path)
+
+    def on_created(self, event):
 
         self.on_modified(event)
 
+    def on_moved(self, event):
 
-def start_watcher():
+        # Excel and many sync tools save via a temp file renamed into place
+        if not event.is_directory and _is_workbook(event.dest_path):
+            self.queue.push(event.dest_path)
+
+    def on_deleted(self, event):
+
+        if not event.is_directory and _is_workbook(event.src_path):
+            self.queue.remove_orphans()
+
+
+def start_watcher(workers: int = WATCH_WORKERS):
     
     print(f"Watching folder: {WATCH_FOLDER}")
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-    event_handler = ExcelEventHandler()
+    queue = GenerationQueue(OUTPUT_FOLDER, workers=workers)
+    queue.start()
+    retention.start_background()
+
+    event_handler = ExcelEventHandler(queue)
     observer = Observer()
     observer.schedule(event_handler, WATCH_FOLDER, recursive=False)   
     observer.start()
@@ -53,4 +244,5 @@ def start_watcher():
         observer.stop()
         print("Watcher stopped.")
 
-    observer.join()
\ No newline at end of file
+    observer.join()
+    queue.stop()
@@ -3,31 +3,34 @@ src/webhook.py
 """
 
 
-import requests
 from datetime import datetime
 import os
 from typing import Tuple
+from src import metrics
+from src.http_client import get_session
+from src.pdf_output import pdf_name
 
 
 DEMO_MODE = os.getenv("DEMO_MODE", "1") == "1" or bool(os.getenv("SPACE_ID"))
 
 
-def post_webhook_message(webhook_url: str | None, pdf_path: str,payload_extra: dict | None = None) -> Tuple[bool, str]:
+@metrics.timed("notify.webhook")
+def post_webhook_message(webhook_url: str | None, pdf_path, payload_extra: dict | None = None) -> Tuple[bool, str]:
     
     if DEMO_MODE:
-        msg = f"[DEMO] Webhook called with {os.path.basename(pdf_path)}"
+        msg = f"[DEMO] Webhook called with {pdf_name(pdf_path)}"
         print(msg)
         return True, msg
 
     if not webhook_url:
         return False, "No webhook URL provided."
-    payload = {"file": os.path.basename(pdf_path)}
+    payload = {"file": pdf_name(pdf_path)}
 
     if payload_extra:
         payload.update(payload_extra)
 
     try:
-        r = requests.post(webhook_url, json=payload, timeout=8)
+        r = get_session().post(webhook_url, json=payload, timeout=8)
         if r.status_code // 100 == 2:
             return True, "Webhook posted."
         return False, f"Webhook error: {r.status_code} {r.text}"
@@ -0,0 +1,231 @@
+"""
+src/workbook_cache.py
+
+Content-addressed cache of parsed, cleaned workbook sheets.
+
+Entries are keyed by the workbook's content hash (plus a hash of the
+cleaning code), so the web UI, CLI and watcher never parse the same
+workbook twice. Recently used DataFrames stay in memory under an LRU
+byte budget; every entry is also written to Parquet so the cache
+survives restarts. Without pyarrow the disk tier is simply skipped.
+
+Each cleaned sheet carries the `validation` report for its raw rows in
+`df.attrs["validation"]`, so a cache hit still knows about bad data.
+
+Cached DataFrames are shared: treat them as read-only.
+"""
+
+
+import json
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+from src.excel_parser import load_excel, load_all_sheets, iter_excel_chunks, clean_dataframe, add_computed_fields, COLUMN_ORDER
+from src.manifest import file_hash
+from src.validation import validate
+
+
+CACHE_DIR = os.getenv("WORKBOOK_CACHE_DIR", os.path.join("cache", "workbooks"))
+CACHE_MEMORY_MB = float(os.getenv("WORKBOOK_CACHE_MEMORY_MB", "256"))
+CACHE_DISK_MB = float(os.getenv("WORKBOOK_CACHE_DISK_MB", "1024"))
+# Larger sheets are streamed instead of cached, keeping memory flat
+CACHE_MAX_ENTRY_MB = float(os.getenv("WORKBOOK_CACHE_MAX_ENTRY_MB", "64"))
+
+# Cleaning and validation changes must invalidate old entries
+_CODE_VERSION = "".join(
+    file_hash(os.path.join(os.path.dirname(__file__), name))[:4] for name in ("excel_parser.py", "validation.py")
+)
+FIRST_SHEET = None
+
+_lock = threading.RLock()
+_memory = OrderedDict()   # key -> (DataFrame, bytes)
+_memory_bytes = 0
+_hashes = {}              # (abs path, size, mtime) -> content hash
+
+
+def _mb(n_bytes: float) -> float:
+
+    return n_bytes / (1024 * 1024)
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+
+    return int(df.memory_usage(deep=True).sum())
+
+def workbook_key(path: str) -> str:
+    """Content hash of the workbook (memoised on size + mtime)."""
+
+    stat = os.stat(path)
+    stat_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        digest = _hashes.get(stat_key)
+    if digest is None:
+        digest = file_hash(path)
+        with _lock:
+            _hashes[stat_key] = digest
+    return f"{digest[:32]}-{_CODE_VERSION}"
+
+def _entry_name(key: str, sheet: str | None) -> str:
+
+    if sheet is FIRST_SHEET:
+        return f"{key}_first"
+    return f"{key}_sheet-{sheet.encode().hex()}"
+
+def _disk_path(name: str) -> str:
+
+    return os.path.join(CACHE_DIR, f"{name}.parquet")
+
+def _remember(name: str, df: pd.DataFrame) -> None:
+
+    global _memory_bytes
+    size = _frame_bytes(df)
+    budget = CACHE_MEMORY_MB * 1024 * 1024
+    if size > budget:
+        return
+
+    with _lock:
+        if name in _memory:
+            _memory_bytes -= _memory.pop(name)[1]
+        _memory[name] = (df, size)
+        _memory_bytes += size
+        while _memory_bytes > budget:
+            _, (_, evicted) = _memory.popitem(last=False)
+            _memory_bytes -= evicted
+
+def _get(name: str) -> pd.DataFrame | None:
+
+    with _lock:
+        if name in _memory:
+            _memory.move_to_end(name)
+            return _memory[name][0]
+
+    path = _disk_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        # Missing pyarrow or a torn file: treat as a miss
+        return None
+    os.utime(path)
+    _remember(name, df)
+    return df
+
+def _put(name: str, df: pd.DataFrame) -> None:
+
+    _remember(name, df)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{_disk_path(name)}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, _disk_path(name))
+        _prune_disk()
+    except Exception as e:
+        print(f"[Cache] Not persisting {name}: {e}")
+
+def _prune_disk() -> None:
+
+    entries = sorted(
+        (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+        for entry in os.scandir(CACHE_DIR)
+        if entry.is_file()
+    )
+    total = sum(size for _, size, _ in entries)
+    budget = CACHE_DISK_MB * 1024 * 1024
+    for _, size, path in entries:
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def peek(path: str, sheet: str | None = FIRST_SHEET) -> pd.DataFrame | None:
+    """Cached cleaned sheet, or None without parsing anything."""
+
+    return _get(_entry_name(workbook_key(path), sheet))
+
+def store(path: str, df: pd.DataFrame, sheet: str | None = FIRST_SHEET) -> bool:
+    """Cache an already cleaned sheet (skipped above the per-entry size cap)."""
+
+    if _mb(_frame_bytes(df)) > CACHE_MAX_ENTRY_MB:
+        return False
+    _put(_entry_name(workbook_key(path), sheet), df)
+    return True
+
+def load(path: str) -> pd.DataFrame:
+    """The cleaned first sheet of `path`, parsed at most once."""
+
+    df = peek(path)
+    if df is not None:
+        return df
+
+    df = load_excel(path)
+    report = validate(df)
+    df = add_computed_fields(clean_dataframe(df))
+    df.attrs["validation"] = report
+    store(path, df)
+    return df
+
+def head(path: str, rows: int) -> pd.DataFrame:
+    """
+    The first `rows` cleaned rows of the first sheet: from the cache when
+    it's there, else streamed without reading the rest of the workbook.
+    """
+
+    df = peek(path)
+    if df is not None:
+        return df.head(rows)
+
+    chunks = iter_excel_chunks(path, chunk_size=rows)
+    try:
+        df = next(chunks, None)
+    finally:
+        chunks.close()
+    if df is None:
+        return pd.DataFrame(columns=COLUMN_ORDER)
+    return add_computed_fields(clean_dataframe(df))
+
+def load_sheets(path: str) -> dict:
+    """
+    Every sheet of `path` that has the required columns, cleaned.
+
+    On a miss the workbook is opened once for all sheets, each read as
+    `iter_excel_chunks` streams it.
+    """
+
+    key = workbook_key(path)
+    index_path = os.path.join(CACHE_DIR, f"{key}_sheets.json")
+
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            names = json.load(f)
+        sheets = {name: _get(_entry_name(key, name)) for name in names}
+        if all(df is not None for df in sheets.values()):
+            return sheets
+
+    sheets = {}
+    for name, df in load_all_sheets(path).items():
+        if isinstance(df, ValueError):
+            print(f"Skipping sheet '{name}': {df}")
+            continue
+        report = validate(df)
+        sheets[name] = add_computed_fields(clean_dataframe(df))
+        sheets[name].attrs["validation"] = report
+        store(path, sheets[name], sheet=name)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(index_path, "w") as f:
+            json.dump(list(sheets), f)
+    except OSError:
+        pass
+    return sheets
+
+def clear_memory() -> None:
+
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
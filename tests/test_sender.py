@@ -0,0 +1,74 @@
+import smtplib
+import pytest
+from src import notify, sender
+
+
+class FakeSMTP:
+    """Records connections; `reply` is what `send_message` does."""
+
+    connections = 0
+    reply = None
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+        self.sent = []
+
+    def ehlo(self):
+        pass
+
+    def starttls(self, context=None):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return 250, b"OK"
+
+    def send_message(self, msg):
+        if FakeSMTP.reply:
+            raise FakeSMTP.reply
+        self.sent.append(msg)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def smtp(monkeypatch, tmp_path):
+
+    for name, value in {"SMTP_HOST": "smtp.test", "SMTP_PORT": "587", "SMTP_USER": "user", "SMTP_PASS": "pass"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(sender, "DEMO_MODE", False)
+    monkeypatch.setattr(sender.smtplib, "SMTP", FakeSMTP)
+    FakeSMTP.connections = 0
+    FakeSMTP.reply = None
+    pdf = tmp_path / "sheet.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    return str(pdf)
+
+def test_rejected_recipient_connects_once(smtp):
+
+    FakeSMTP.reply = smtplib.SMTPRecipientsRefused({"nobody@test": (550, b"No such user")})
+    ok, msg = notify._with_retries("Email", sender.send_pdf_via_email, (smtp,), {}, attempts=3, retry_if=notify._email_is_transient)
+
+    assert not ok and msg.startswith("Email rejected")
+    assert FakeSMTP.connections == 1
+
+def test_timeout_after_data_is_not_resent(smtp):
+
+    FakeSMTP.reply = TimeoutError("timed out")
+    with sender.SMTPBatchSender() as batch:
+        ok, msg = batch.send(smtp)
+
+    assert not ok and msg.startswith("Email failed")
+    assert FakeSMTP.connections == 1
+
+def test_dropped_connection_reconnects_before_sending(smtp, monkeypatch):
+
+    with sender.SMTPBatchSender() as batch:
+        assert batch.send(smtp)[0]
+        monkeypatch.setattr(batch._server, "noop", lambda: (421, b"Closing"))
+        assert batch.send(smtp)[0]
+
+    assert FakeSMTP.connections == 2
@@ -0,0 +1,47 @@
+import openpyxl
+import pytest
+from src import excel_parser, workbook_cache
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+
+    monkeypatch.setattr(workbook_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    workbook_cache.clear_memory()
+    yield
+    workbook_cache.clear_memory()
+
+def _workbook(path):
+
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for category in ("Tools", "Garden", "Kitchen"):
+        sheet = workbook.create_sheet(category)
+        sheet.append(["SKU", "Name", "Description", "Price", "Stock"])
+        sheet.append([f"{category}-1", "Item", "Thing", 9.99, 3])
+        sheet.append([None] * 5)
+        sheet.append([f"{category}-2", "Other", "Thing", 4.5, 0])
+    workbook.create_sheet("Notes").append(["Anything"])
+    workbook.save(path)
+    return str(path)
+
+def test_load_sheets_opens_the_workbook_once(cache_dir, monkeypatch, tmp_path):
+
+    path = _workbook(tmp_path / "multi.xlsx")
+    calls = []
+    real = excel_parser.load_workbook
+    monkeypatch.setattr(excel_parser, "load_workbook", lambda *args, **kwargs: calls.append(args) or real(*args, **kwargs))
+
+    sheets = workbook_cache.load_sheets(path)
+
+    assert len(calls) == 1
+    assert list(sheets) == ["Tools", "Garden", "Kitchen"]
+    # Blank lines are dropped, as in the streaming path
+    assert all(len(df) == 2 for df in sheets.values())
+
+def test_load_matches_streamed_rows(cache_dir, tmp_path):
+
+    path = _workbook(tmp_path / "multi.xlsx")
+    streamed = sum(len(chunk) for chunk in excel_parser.iter_excel_chunks(path))
+
+    assert len(workbook_cache.load(path)) == streamed == 2